@@ -0,0 +1,295 @@
+#!/usr/bin/env python
+
+"""Checks programmes before they run and shrinks their transition tables.
+
+The machine only notices a mistake in a programme when it reaches the rule
+in question: a state without a rule for a symbol silently applies its last
+rule (see get_index()), and a state change past the first or last state or
+an unknown move stops the machine with an incorrect instruction. validate()
+finds these problems by looking at every rule of the programme.
+
+optimise() then removes the states the machine can never reach from its
+initial state and merges the states that behave alike, i.e. that write the
+same symbols, move the same way and go on to equivalent states for every
+symbol they scan. This is the minimisation of a deterministic automaton by
+partition refinement, applied to the control of the machine. The optimised
+programme performs the same steps as the original on every tape, but its
+states are numbered anew, starting with the initial state as state 0:
+
+    python analysis.py --programme programme_2 --dump
+"""
+
+import argparse
+import sys
+from collections import namedtuple
+
+from loader import MAGIC, dump_text, load_binary, parse_text
+from turing import (MOVES, PROGRAMMES, CompiledProgramme, compile_programme,
+                    get_index)
+
+
+# A problem found by validate(): the state and index of the rule concerned
+# (rule is None for problems of the state as a whole), the severity and a
+# description. The severity is 'invalid' if the programme cannot be
+# compiled at all, 'error' if the rule stops the machine with an incorrect
+# instruction and 'warning' otherwise.
+Issue = namedtuple('Issue', ['state', 'rule', 'severity', 'message'])
+
+# What optimise() did to a programme: the number of states of the original,
+# the number of those reachable from the initial state and the number left
+# after merging, the number of rules before and after, and the old state
+# number of every new state.
+Report = namedtuple('Report', ['states', 'reachable', 'merged', 'rules',
+                               'optimised_rules', 'origins'])
+
+
+def alphabet(programme):
+    """Returns the symbols a programme reads or writes, blank first."""
+    symbols = {str(None): None}
+    for instructions in programme[0]:
+        for rule in instructions:
+            for symbol in rule[:2]:
+                symbols.setdefault(str(symbol), symbol)
+    return list(symbols.values())
+
+
+def validate(programme, state_id=0):
+    """Returns the Issues of a programme in the nested list format.
+
+    Every rule must have four fields, a known move and an integer state
+    change that leads to an existing state (unless the rule halts). A rule
+    for a symbol that an earlier rule of the state already handles is never
+    applied, and a symbol without a rule of its own falls through to the
+    last rule of the state. States that cannot be reached from state_id are
+    reported, too.
+    """
+    issues = []
+    states = programme[0]
+    symbols = alphabet(programme)
+    for state, instructions in enumerate(states):
+        if not instructions:
+            issues.append(Issue(state, None, 'invalid',
+                                'the state has no rules'))
+            continue
+        seen = set()
+        for index, rule in enumerate(instructions):
+            if len(rule) != 4:
+                issues.append(Issue(state, index, 'invalid',
+                                    f'expected 4 fields, not {len(rule)}'))
+                continue
+            symbol, _, move, instr = rule
+            if str(symbol) in seen:
+                issues.append(Issue(state, index, 'warning',
+                                    f'the symbol {symbol} is already handled '
+                                    f'by an earlier rule'))
+            seen.add(str(symbol))
+            try:
+                target = state + int(instr)
+            except (TypeError, ValueError):
+                issues.append(Issue(state, index, 'invalid',
+                                    f'the state change {instr!r} is not an '
+                                    f'integer'))
+                target = None
+            if move not in MOVES:
+                issues.append(Issue(state, index, 'error',
+                                    f'unknown move {move!r}'))
+            elif move != 'halt' and target is not None and \
+                    not 0 <= target < len(states):
+                issues.append(Issue(state, index, 'error',
+                                    f'the state change {instr} leads to the '
+                                    f'state {target}, which does not exist'))
+        missing = [symbol for symbol in symbols if str(symbol) not in seen]
+        if missing:
+            issues.append(Issue(state, None, 'warning',
+                                f"no rule for {', '.join(map(str, missing))}"
+                                f' (the last rule applies)'))
+
+    if not any(issue.severity == 'invalid' for issue in issues):
+        unreachable = set(range(len(states))) - set(
+            reachable(compile_programme(programme), state_id))
+        for state in sorted(unreachable):
+            issues.append(Issue(state, None, 'warning',
+                                f'the state cannot be reached from state '
+                                f'{state_id}'))
+    return issues
+
+
+def reachable(compiled, state_id=0):
+    """Returns the states a compiled programme can reach from state_id.
+
+    A state is reachable if a rule that moves the head leads to it from a
+    reachable state, whatever the symbols on the tape. The states are
+    listed in the order in which they are first reached.
+    """
+    table, width = compiled.table, compiled.width
+    order = [state_id]
+    seen = {state_id}
+    for state in order:
+        for write, move, next_state in table[state * width:
+                                             (state + 1) * width]:
+            if move and next_state not in seen:
+                seen.add(next_state)
+                order.append(next_state)
+    return order
+
+
+def equivalent(compiled, states):
+    """Partitions states into classes of states that behave alike.
+
+    Returns the class of every state as a dict. Two states are in the same
+    class if, for every symbol, they write the same symbol, move the head
+    the same way and (unless they stop the machine) go on to states of the
+    same class. The classes are refined until they no longer change.
+    """
+    table, width = compiled.table, compiled.width
+    actions = {state: tuple((write, move) for write, move, _ in
+                            table[state * width:(state + 1) * width])
+               for state in states}
+    classes = number(states, actions)
+    while True:
+        signatures = {
+            state: (classes[state],) + tuple(
+                classes[next_state] if move else None
+                for _, move, next_state in
+                table[state * width:(state + 1) * width])
+            for state in states}
+        refined = number(states, signatures)
+        if len(set(refined.values())) == len(set(classes.values())):
+            return refined
+        classes = refined
+
+
+def number(states, keys):
+    """Numbers the distinct keys of the states in the order of states."""
+    numbers = {}
+    return {state: numbers.setdefault(keys[state], len(numbers))
+            for state in states}
+
+
+def optimise(programme, state_id=0):
+    """Removes unreachable states and merges equivalent ones.
+
+    Returns the optimised programme in the nested list format and a Report.
+    The initial state of the optimised programme is state 0. A halted
+    machine ends in the new number of the state its last rule names, or in
+    its last state if that state was removed.
+    """
+    compiled = compile_programme(programme)
+    order = reachable(compiled, state_id)
+    classes = equivalent(compiled, order)
+    origins = []
+    for state in order:
+        if classes[state] == len(origins):
+            origins.append(state)
+
+    table, width, symbols = compiled.table, compiled.width, compiled.symbols
+    states = []
+    for new_state, state in enumerate(origins):
+        rules = {}
+        for code, (write, move, next_state) in enumerate(
+                table[state * width:(state + 1) * width]):
+            if move:
+                rule = (write, 'right' if move == 1 else 'left',
+                        classes[next_state] - new_state)
+            elif move is None:
+                # An incorrect instruction stays one: leave the programme.
+                rule = (write, 'right', -new_state - 1)
+            else:
+                rule = (write, 'halt',
+                        classes.get(next_state, new_state) - new_state)
+            rules.setdefault(rule, []).append(code)
+        # The most common rule comes last and covers the symbols that have
+        # no rule of their own.
+        ordered = sorted(rules.items(), key=lambda item: len(item[1]))
+        instructions = [[symbols[code], symbols[write], move, instr]
+                        for (write, move, instr), codes in ordered[:-1]
+                        for code in codes]
+        (write, move, instr), codes = ordered[-1]
+        instructions.append([symbols[codes[0]], symbols[write], move, instr])
+        states.append(instructions)
+
+    # Keep every symbol of the original in the alphabet, so that the
+    # optimised programme accepts the same tapes: state 0 gets a rule of
+    # its own for the symbols no other rule mentions.
+    mentioned = {str(symbol) for symbol in alphabet([states])}
+    for code, symbol in enumerate(symbols):
+        if str(symbol) not in mentioned:
+            rule = states[0][get_index(states[0], symbol)]
+            states[0].insert(-1, [symbol] + rule[1:])
+
+    optimised = [states]
+    report = Report(compiled.states, len(order), len(origins),
+                    count_rules(programme),
+                    count_rules(optimised), origins)
+    return optimised, report
+
+
+def count_rules(programme):
+    if isinstance(programme, CompiledProgramme):
+        return len(programme.table)
+    return sum(len(instructions) for instructions in programme[0])
+
+
+def read_programme(name):
+    """Returns a programme by name or from a text or binary file."""
+    if name in PROGRAMMES:
+        return PROGRAMMES[name]
+    with open(name, 'rb') as file:
+        data = file.read()
+    if data.startswith(MAGIC):
+        return decompile(load_binary(data))
+    return parse_text(data.decode())
+
+
+def decompile(compiled):
+    """Turns a compiled programme back into the nested list format."""
+    states = []
+    for state in range(compiled.states):
+        instructions = []
+        for code in range(compiled.width):
+            write, move, next_state = compiled.table[
+                state * compiled.width + code]
+            name = {1: 'right', -1: 'left', 0: 'halt', None: 'error'}[move]
+            instructions.append([compiled.symbols[code],
+                                 compiled.symbols[write], name,
+                                 next_state - state])
+        states.append(instructions)
+    return [states]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Validate a programme and remove unreachable and '
+                    'redundant states.')
+    parser.add_argument('--programme', default='programme_2',
+                        help='the name of a programme ('
+                             f"{', '.join(sorted(PROGRAMMES))}) or a "
+                             'programme file (see loader.py)')
+    parser.add_argument('--state', type=int, default=0,
+                        help='the initial state (default: 0)')
+    parser.add_argument('--dump', action='store_true',
+                        help='write the optimised programme in the text '
+                             'format')
+    args = parser.parse_args(argv)
+
+    programme = read_programme(args.programme)
+    issues = validate(programme, args.state)
+    for issue in issues:
+        where = f'state {issue.state}'
+        if issue.rule is not None:
+            where += f', rule {issue.rule}'
+        print(f'{issue.severity}: {where}: {issue.message}', file=sys.stderr)
+    if any(issue.severity == 'invalid' for issue in issues):
+        return 1
+
+    optimised, report = optimise(programme, args.state)
+    print(f'{report.states} states, {report.reachable} reachable, '
+          f'{report.merged} after merging; {report.rules} rules, '
+          f'{report.optimised_rules} after optimising', file=sys.stderr)
+    if args.dump:
+        sys.stdout.write(dump_text(optimised))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+
+"""Runs one programme over many tapes in a pool of worker processes.
+
+The programme is compiled once and handed to every worker when the pool
+starts; the tapes are sent to the workers in chunks. Tapes are read one per
+line as Python lists, as printed by turing.py, e.g.
+
+    ['start', 1, 0, 1, None, 1, 1]
+
+and every result is written as one line of JSON.
+"""
+
+import argparse
+import ast
+import json
+import multiprocessing
+import sys
+from collections import namedtuple
+
+from turing import PROGRAMMES, compile_programme, turing_machine
+
+
+# The result of running the programme over one input tape.
+BatchResult = namedtuple('BatchResult', ['input', 'output', 'steps', 'reason'])
+
+# The configuration shared by the runs of a worker process, set by _init().
+_job = None
+
+
+def _init(programme, head_id, state_id, max_steps, detect_cycles):
+    global _job
+    _job = (programme, head_id, state_id, max_steps, detect_cycles)
+
+
+def _run(input_tape):
+    programme, head_id, state_id, max_steps, detect_cycles = _job
+    try:
+        result = turing_machine(list(input_tape), programme, head_id,
+                                state_id, max_steps,
+                                detect_cycles=detect_cycles)
+    except ValueError:
+        # A symbol the programme does not know: only this tape fails.
+        return BatchResult(input_tape, None, 0, 'invalid')
+    return BatchResult(input_tape, result.tape, result.steps, result.reason)
+
+
+def run_batch(programme, tapes, head_id=0, state_id=0, max_steps=None,
+              processes=None, chunksize=64, ordered=True,
+              detect_cycles=False):
+    """Runs a programme over every tape of an iterable.
+
+    Yields a BatchResult for every tape, in the order of the input if
+    ordered is True and in the order in which the runs finish otherwise.
+    A tape with a symbol that the programme does not know gives a
+    BatchResult without output and with reason 'invalid'.
+    processes is the size of the pool (the number of CPUs by default) and
+    chunksize the number of tapes sent to a worker at once. Give max_steps
+    to stop programmes that do not halt, and detect_cycles to stop those
+    that provably never halt early (with reason 'non-halting').
+    """
+    compiled = compile_programme(programme)
+    with multiprocessing.Pool(processes, _init,
+                              (compiled, head_id, state_id, max_steps,
+                               detect_cycles)) as pool:
+        imap = pool.imap if ordered else pool.imap_unordered
+        yield from imap(_run, tapes, chunksize)
+
+
+def read_tapes(lines):
+    """Parses one tape per non-empty line."""
+    for line in lines:
+        if line.strip():
+            yield ast.literal_eval(line.strip())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Run a Turing machine programme over many tapes.')
+    parser.add_argument('tapes', nargs='?', default='-',
+                        help='file with one tape per line (default: stdin)')
+    parser.add_argument('--programme', choices=sorted(PROGRAMMES),
+                        default='programme_2')
+    parser.add_argument('--max-steps', type=int,
+                        help='stop a run after this many steps')
+    parser.add_argument('--processes', type=int,
+                        help='number of worker processes (default: all CPUs)')
+    parser.add_argument('--chunksize', type=int, default=64,
+                        help='number of tapes sent to a worker at once')
+    parser.add_argument('--unordered', action='store_true',
+                        help='write results as soon as they are ready')
+    parser.add_argument('--detect-cycles', action='store_true',
+                        help='stop machines that provably never halt')
+    args = parser.parse_args(argv)
+
+    lines = sys.stdin if args.tapes == '-' else open(args.tapes)
+    with lines:
+        for result in run_batch(PROGRAMMES[args.programme],
+                                read_tapes(lines),
+                                max_steps=args.max_steps,
+                                processes=args.processes,
+                                chunksize=args.chunksize,
+                                ordered=not args.unordered,
+                                detect_cycles=args.detect_cycles):
+            print(json.dumps(result._asdict()))
+
+
+if __name__ == '__main__':
+    main()
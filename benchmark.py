@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+
+"""Measures the throughput of the Turing machine in steps per second.
+
+programme_1 and programme_2 are run over random binary numbers of
+increasing bit length in each of the following modes:
+
+    sweeps       the default engine: compiled table and bulk head sweeps
+    compiled     the compiled table, but every step performed on its own
+    traced       the default engine narrating every step (to /dev/null)
+    interpreted  the original algorithm, which looks the rule up with
+                 get_index() on every step
+
+For every run the steps, wall time, steps per second and peak memory are
+written as JSON, so that runs on different commits can be compared.
+programme_2 needs a number of steps exponential in the bit length, so all
+runs are capped by --max-steps.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from turing import (MOVES, NarratingTracer, PROGRAMMES, change_state,
+                    compile_programme, get_index, turing_machine)
+
+
+MODES = ['sweeps', 'compiled', 'traced', 'interpreted']
+
+# Modes that get too slow for long runs: the largest bit length they are
+# run for and their own step limit.
+SLOW_MODES = {'traced': (512, 20000)}
+
+
+def interpret(input_tape, programme, head_id, state_id, max_steps):
+    """Runs a programme the way turing_machine() originally did.
+
+    The rule is looked up with get_index() and the state changed with
+    change_state() on every step, on a plain list that grows to the right.
+    Returns the number of steps performed.
+    """
+    steps = 0
+    while steps < max_steps:
+        instructions = programme[0][state_id]
+        _, write, move, instr = instructions[
+            get_index(instructions, input_tape[head_id])]
+        input_tape[head_id] = write
+        state_id = change_state(instr, state_id)
+        steps += 1
+        if MOVES.get(move) is None or move == 'halt':
+            break
+        head_id += MOVES[move]
+        if head_id == len(input_tape):
+            input_tape.append(None)
+    return steps
+
+
+def make_tape(name, bits, rng):
+    """Returns a tape with random numbers of `bits` bits for a programme."""
+    def number():
+        return [rng.randint(0, 1) for _ in range(bits)]
+
+    if name == 'programme_1':
+        return ['start'] + number()
+    return ['start'] + number() + [None] + number()
+
+
+def prepare(mode, name):
+    """Returns the programme as a mode runs it, compiled if it needs to be.
+
+    Programmes are prepared once, outside the timed runs, so that every
+    mode is measured on the steps alone.
+    """
+    programme = PROGRAMMES[name]
+    if mode == 'interpreted':
+        return programme
+    compiled = compile_programme(programme)
+    if mode == 'compiled':
+        compiled = compiled._replace(sweeps=[None] * len(compiled.table))
+    return compiled
+
+
+def run_once(mode, programme, input_tape, max_steps):
+    """Runs one mode over a copy of the tape; returns the step count."""
+    input_tape = list(input_tape)
+    if mode == 'interpreted':
+        return interpret(input_tape, programme, 0, 0, max_steps)
+    if mode == 'traced':
+        with open(os.devnull, 'w') as devnull, \
+                contextlib.redirect_stdout(devnull):
+            return turing_machine(input_tape, programme, 0, 0, max_steps,
+                                  NarratingTracer()).steps
+    return turing_machine(input_tape, programme, 0, 0, max_steps).steps
+
+
+def measure(mode, name, bits, max_steps, repeat, memory, rng):
+    input_tape = make_tape(name, bits, rng)
+    programme = prepare(mode, name)
+    wall_time = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        steps = run_once(mode, programme, input_tape, max_steps)
+        wall_time = min(wall_time, time.perf_counter() - start)
+
+    peak_memory = None
+    if memory:
+        tracemalloc.start()
+        run_once(mode, programme, input_tape, max_steps)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        'programme': name,
+        'mode': mode,
+        'bits': bits,
+        'steps': steps,
+        'wall_time': wall_time,
+        'steps_per_second': steps / wall_time if wall_time else None,
+        'peak_memory': peak_memory,
+    }
+
+
+def commit():
+    """Returns the git commit of the working tree, if there is one."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() \
+            or None
+    except OSError:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark the Turing machine in steps per second.')
+    parser.add_argument('--programmes', nargs='+', choices=sorted(PROGRAMMES),
+                        default=sorted(PROGRAMMES))
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES)
+    parser.add_argument('--sizes', nargs='+', type=int,
+                        default=[8, 64, 512, 4096, 32768, 100000],
+                        help='bit lengths of the numbers on the tape')
+    parser.add_argument('--max-steps', type=int, default=10 ** 6,
+                        help='step limit of every run')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='runs per measurement; the fastest one counts')
+    parser.add_argument('--no-memory', dest='memory', action='store_false',
+                        help='skip the extra run that measures peak memory')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='JSON file (default: stdout)')
+    args = parser.parse_args(argv)
+
+    results = []
+    for name in args.programmes:
+        for mode in args.modes:
+            for bits in args.sizes:
+                max_bits, max_steps = SLOW_MODES.get(
+                    mode, (bits, args.max_steps))
+                if bits > max_bits:
+                    continue
+                result = measure(mode, name, bits,
+                                 min(max_steps, args.max_steps),
+                                 args.repeat, args.memory,
+                                 random.Random(args.seed))
+                print(f"{name} {mode} {bits} bits: {result['steps']} steps, "
+                      f"{result['steps_per_second']:.0f} steps/s",
+                      file=sys.stderr)
+                results.append(result)
+
+    report = {
+        'commit': commit(),
+        'python': platform.python_version(),
+        'max_steps': args.max_steps,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+
+"""Checkpoints long runs of the Turing machine and resumes them.
+
+A checkpoint file starts with the compiled programme (in the binary format
+of loader.py) and the layout of the tape, followed by one record per
+checkpoint. A record holds the step count, the head position, the state and
+the pages of the tape handed out since the previous record, so only the
+regions of the tape the machine has been working on are written again.
+Loading replays the records in order; an incomplete last record, e.g. from a
+crash while writing it, is ignored.
+
+    python checkpoint.py run.ckpt --programme programme_2 --tape "[...]"
+    python checkpoint.py run.ckpt --resume
+"""
+
+import argparse
+import ast
+import os
+import signal
+import struct
+import threading
+
+from loader import dump_binary, load_binary
+from turing import (Machine, PROGRAMMES, Tape, Tracer, head_init,
+                    run_machine, state_init, tape)
+
+
+MAGIC = b'TURC\x01'
+
+HEADER = struct.Struct('<BqI')
+RECORD = struct.Struct('<qqqBI')
+PAGE = struct.Struct('<q')
+
+REASONS = [None, 'halt', 'error', 'non-halting']
+
+
+def record(machine, numbers):
+    """Returns a record with the registers and the given pages."""
+    pages = machine.cells.pages
+    numbers = [number for number in sorted(numbers) if number in pages]
+    parts = [RECORD.pack(machine.steps, machine.head, machine.state,
+                         REASONS.index(machine.reason), len(numbers))]
+    for number in numbers:
+        parts += [PAGE.pack(number), bytes(pages[number])]
+    return b''.join(parts)
+
+
+def save(machine, path):
+    """Writes a complete checkpoint of a machine, replacing the file."""
+    programme = dump_binary(machine.programme)
+    with open(path + '.tmp', 'wb') as file:
+        file.write(MAGIC)
+        file.write(HEADER.pack(machine.cells.page_bits, machine.cells.length,
+                               len(programme)))
+        file.write(programme)
+        file.write(record(machine, machine.cells.pages))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(path + '.tmp', path)
+    machine.cells.dirty.clear()
+
+
+def append(machine, path):
+    """Appends the changes since the last checkpoint to a checkpoint file."""
+    with open(path, 'ab') as file:
+        file.write(record(machine, machine.cells.dirty))
+        file.flush()
+        os.fsync(file.fileno())
+    machine.cells.dirty.clear()
+
+
+def load(path):
+    """Loads the machine from the last complete record of a checkpoint."""
+    with open(path, 'rb') as file:
+        data = file.read()
+    if not data.startswith(MAGIC):
+        raise ValueError('Not a Turing machine checkpoint')
+    offset = len(MAGIC)
+    page_bits, length, size = HEADER.unpack_from(data, offset)
+    offset += HEADER.size
+    machine = Machine(load_binary(data[offset:offset + size]), [])
+    offset += size
+    machine.cells = Tape(page_bits=page_bits)
+    machine.cells.length = length
+    page_size = machine.cells.page_size
+
+    pages = {}
+    while offset + RECORD.size <= len(data):
+        steps, head, state, reason, count = RECORD.unpack_from(data, offset)
+        end = offset + RECORD.size + count * (PAGE.size + page_size)
+        if end > len(data):
+            break
+        offset += RECORD.size
+        for _ in range(count):
+            number, = PAGE.unpack_from(data, offset)
+            offset += PAGE.size
+            pages[number] = bytearray(data[offset:offset + page_size])
+            offset += page_size
+        machine.steps, machine.head, machine.state = steps, head, state
+        machine.reason = REASONS[reason]
+
+    machine.cells.pages = pages
+    return machine
+
+
+class Checkpointer(Tracer):
+    """Checkpoints a running machine to a file.
+
+    A complete checkpoint is written when the machine starts and when it
+    stops; in between, the changes are appended every `interval` steps and
+    whenever the process receives one of `signals`. Signals are looked at
+    every `every` steps, and only handled if the machine runs in the main
+    thread.
+    """
+
+    def __init__(self, path, interval=10 ** 8, every=1 << 16,
+                 signals=(getattr(signal, 'SIGUSR1', None),)):
+        self.path = path
+        self.interval = interval
+        self.every = every
+        self.signals = [signum for signum in signals if signum is not None]
+
+    def request(self, signum, frame):
+        self.requested = True
+
+    def start(self, machine):
+        self.machine = machine
+        self.requested = False
+        self.last = machine.steps
+        # Signal handlers can only be installed in the main thread.
+        self.handlers = {}
+        if threading.current_thread() is threading.main_thread():
+            self.handlers = {signum: signal.signal(signum, self.request)
+                             for signum in self.signals}
+        save(machine, self.path)
+
+    def step(self, machine):
+        if self.requested or machine.steps - self.last >= self.interval:
+            append(machine, self.path)
+            self.requested = False
+            self.last = machine.steps
+
+    def finish(self, result):
+        for signum, handler in self.handlers.items():
+            signal.signal(signum, handler)
+        save(self.machine, self.path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Run a Turing machine with checkpoints, or resume it.')
+    parser.add_argument('checkpoint', help='the checkpoint file')
+    parser.add_argument('--resume', action='store_true',
+                        help='continue from the checkpoint file')
+    parser.add_argument('--programme', choices=sorted(PROGRAMMES),
+                        default='programme_2')
+    parser.add_argument('--tape', type=ast.literal_eval, default=tape,
+                        help='the tape as a Python list')
+    parser.add_argument('--max-steps', type=int,
+                        help='stop the machine after this many steps')
+    parser.add_argument('--interval', type=int, default=10 ** 8,
+                        help='steps between two checkpoints')
+    args = parser.parse_args(argv)
+
+    if args.resume:
+        machine = load(args.checkpoint)
+    else:
+        machine = Machine(PROGRAMMES[args.programme], args.tape, head_init,
+                          state_init)
+    result = run_machine(machine, args.max_steps,
+                         Checkpointer(args.checkpoint, args.interval))
+    print(f'The machine stopped ({result.reason}) in state {result.state} '
+          f'after {result.steps} steps.')
+    print(f'Output: {result.tape}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+
+"""Loads programmes from files and caches their compiled transition tables.
+
+Programmes can be written in a text format with one rule per line, in the
+order [symbol, write, move, state change] of the nested lists in turing.py.
+A line ending in a colon starts the next state; everything after a # is a
+comment. programme_1 reads:
+
+    state_0:
+    start start right 0
+    0 0 right 0
+    1 1 right 0
+    None None left 1
+    state_1:
+    0 1 halt 0
+    1 0 left 0
+
+Symbols are None, integers or (unquoted) strings. The compact binary format
+stores the compiled transition table itself, so loading it skips parsing and
+compiling altogether. load_programme() keeps a binary copy of every text
+file it compiles in a cache directory, keyed by the SHA-256 hash of the
+file's content.
+"""
+
+import argparse
+import ast
+import hashlib
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+from turing import (CompiledProgramme, MOVES, compile_programme,
+                    find_sweeps)
+
+
+MAGIC = b'TURM\x01'
+
+CACHE_DIR = os.environ.get(
+    'TURING_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'turing'))
+
+# The byte codes of the moves in the binary format.
+MOVE_CODES = {0: 0, 1: 1, -1: 2, None: 3}
+CODE_MOVES = {code: move for move, code in MOVE_CODES.items()}
+
+
+def parse_symbol(token):
+    if token == 'None':
+        return None
+    try:
+        return int(token)
+    except ValueError:
+        return token
+
+
+def parse_text(text):
+    """Parses a programme in the text format into the nested list format."""
+    states = []
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            continue
+        if line.endswith(':'):
+            states.append([])
+            continue
+        fields = line.split()
+        if len(fields) != 4:
+            raise ValueError(f'Line {number}: expected a rule of the form '
+                             f'"symbol write move state-change"')
+        if not states:
+            raise ValueError(f'Line {number}: rule outside of a state')
+        if fields[2] not in MOVES:
+            raise ValueError(f'Line {number}: unknown move {fields[2]!r}')
+        try:
+            instr = int(fields[3])
+        except ValueError:
+            raise ValueError(f'Line {number}: the state change must be an '
+                             f'integer') from None
+        states[-1].append([parse_symbol(fields[0]), parse_symbol(fields[1]),
+                           fields[2], instr])
+    return [states]
+
+
+def dump_text(programme):
+    """Writes a programme of the nested list format in the text format."""
+    lines = []
+    for state_id, instructions in enumerate(programme[0]):
+        lines.append(f'state_{state_id}:')
+        for rule in instructions:
+            lines.append(' '.join(str(field) for field in rule))
+    return '\n'.join(lines) + '\n'
+
+
+def dump_binary(programme):
+    """Returns the compiled transition table of a programme as bytes.
+
+    After the magic number follow the number of symbols and states, the
+    symbols as Python literals and then the write codes, the moves and the
+    next states of all rules as three little-endian arrays.
+    """
+    compiled = compile_programme(programme)
+    symbols = repr(compiled.symbols).encode()
+    writes = bytes(rule[0] for rule in compiled.table)
+    moves = bytes(MOVE_CODES[rule[1]] for rule in compiled.table)
+    states = array('i', (rule[2] for rule in compiled.table))
+    if sys.byteorder == 'big':
+        states.byteswap()
+    return b''.join([MAGIC, struct.pack('<III', compiled.width,
+                                        compiled.states, len(symbols)),
+                     symbols, writes, moves, states.tobytes()])
+
+
+def load_binary(data):
+    """Loads a compiled programme from the bytes of dump_binary().
+
+    Raises ValueError for anything that dump_binary() cannot have written,
+    e.g. a truncated file, so that a damaged cache entry is never trusted.
+    """
+    if not data.startswith(MAGIC):
+        raise ValueError('Not a compiled Turing machine programme')
+    offset = len(MAGIC)
+    if len(data) < offset + struct.calcsize('<III'):
+        raise ValueError('Truncated programme header')
+    width, count, length = struct.unpack_from('<III', data, offset)
+    offset += struct.calcsize('<III')
+    size = width * count
+    if len(data) != offset + length + 6 * size:
+        raise ValueError(f'Expected {offset + length + 6 * size} bytes for '
+                         f'{count} states of {width} symbols, not '
+                         f'{len(data)}')
+    try:
+        symbols = ast.literal_eval(data[offset:offset + length].decode())
+    except (SyntaxError, TypeError, ValueError, MemoryError, RecursionError):
+        raise ValueError('Malformed symbols in programme') from None
+    if not isinstance(symbols, tuple) or len(symbols) != width:
+        raise ValueError(f'Expected a tuple of {width} symbols')
+    offset += length
+    writes = data[offset:offset + size]
+    if any(code >= width for code in writes):
+        raise ValueError('Write code out of range')
+    try:
+        moves = [CODE_MOVES[code] for code in data[offset + size:
+                                                   offset + 2 * size]]
+    except KeyError as error:
+        raise ValueError(f'Unknown move code {error.args[0]}') from None
+    states = array('i')
+    states.frombytes(data[offset + 2 * size:offset + 6 * size])
+    if sys.byteorder == 'big':
+        states.byteswap()
+    table = list(zip(writes, moves, states))
+    if any(move and not 0 <= state < count for _, move, state in table):
+        raise ValueError('Next state out of range')
+    return CompiledProgramme(symbols, {str(symbol): code for code, symbol
+                                       in enumerate(symbols)},
+                             table, width, count, find_sweeps(table, width))
+
+
+def load_programme(path, cache_dir=CACHE_DIR):
+    """Loads and compiles a programme from a text or binary file.
+
+    Text files are parsed and compiled only if the cache directory does not
+    hold a binary copy for their content yet; pass cache_dir=None to always
+    compile them.
+    """
+    with open(path, 'rb') as file:
+        data = file.read()
+    if data.startswith(MAGIC):
+        return load_binary(data)
+
+    cached = None
+    if cache_dir is not None:
+        cached = os.path.join(cache_dir,
+                              hashlib.sha256(data).hexdigest() + '.tm')
+        try:
+            with open(cached, 'rb') as file:
+                return load_binary(file.read())
+        except (OSError, ValueError):
+            pass
+
+    compiled = compile_programme(parse_text(data.decode()))
+    if cached is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=cache_dir, delete=False) as file:
+            file.write(dump_binary(compiled))
+        os.replace(file.name, cached)
+    return compiled
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Compile a programme file into the binary format.')
+    parser.add_argument('programme', help='text or binary programme file')
+    parser.add_argument('output', help='binary file to write')
+    args = parser.parse_args(argv)
+
+    with open(args.output, 'wb') as file:
+        file.write(dump_binary(load_programme(args.programme, None)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""Memoizes the results of runs of the Turing machine.
+
+A RunCache answers repeated runs of the same programme over the same tape
+from memory instead of executing the machine again. Entries are keyed by
+the SHA-256 hash of the compiled programme (in the binary format of
+loader.py), the initial configuration, the step limit and the tape. The
+least recently used entries are evicted once the estimated size of all
+results exceeds max_bytes. With a path, results are also stored in an
+SQLite file, so that they survive a restart of the process.
+"""
+
+import hashlib
+import json
+import sqlite3
+import sys
+from collections import OrderedDict
+
+from loader import dump_binary
+from turing import (CompiledProgramme, Result, compile_programme,
+                    turing_machine)
+
+
+# Estimated memory taken by an entry besides its tape.
+ENTRY_OVERHEAD = 256
+
+# The number of programmes whose compiled table and digest are kept.
+PROGRAMMES_KEPT = 64
+
+
+class RunCache:
+    """An LRU cache of run results, optionally backed by an SQLite file."""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, path=None):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.entries = OrderedDict()
+        # The compiled tables and digests of the programmes seen last, by
+        # the content of a programme in the nested list format and by id()
+        # of a compiled one.
+        self.programmes = OrderedDict()
+        self.db = None
+        if path is not None:
+            self.db = sqlite3.connect(path)
+            self.db.execute('CREATE TABLE IF NOT EXISTS runs '
+                            '(key TEXT PRIMARY KEY, result TEXT)')
+
+    def compile(self, programme):
+        """Returns the compiled table and the hash of a programme.
+
+        Both are remembered for the last PROGRAMMES_KEPT programmes, so that
+        running the same programme again neither compiles nor hashes it
+        anew. Programmes in the nested list format are looked up by their
+        content, as they may be changed in place between two runs; compiled
+        programmes are not changed and are looked up by identity.
+        """
+        if isinstance(programme, CompiledProgramme):
+            lookup, owner = id(programme), programme
+        else:
+            lookup, owner = repr(programme), None
+        entry = self.programmes.get(lookup)
+        if entry is None or entry[0] is not owner:
+            compiled = compile_programme(programme)
+            entry = self.programmes[lookup] = (
+                owner, compiled,
+                hashlib.sha256(dump_binary(compiled)).hexdigest())
+            while len(self.programmes) > PROGRAMMES_KEPT:
+                self.programmes.popitem(last=False)
+        else:
+            self.programmes.move_to_end(lookup)
+        return entry[1], entry[2]
+
+    def key(self, digest, input_tape, head_id, state_id, max_steps):
+        run = repr((digest, head_id, state_id, max_steps, list(input_tape)))
+        return hashlib.sha256(run.encode()).hexdigest()
+
+    def run(self, input_tape, programme, head_id=0, state_id=0,
+            max_steps=None):
+        """Runs turing_machine() unless the result is already known.
+
+        Like turing_machine(), the input tape is changed in place.
+        """
+        compiled, digest = self.compile(programme)
+        key = self.key(digest, input_tape, head_id, state_id, max_steps)
+        result = self.get(key)
+        if result is None:
+            self.misses += 1
+            result = turing_machine(input_tape, compiled, head_id, state_id,
+                                    max_steps)
+            self.put(key, result._replace(tape=list(result.tape)))
+            if self.db is not None:
+                with self.db:
+                    self.db.execute(
+                        'INSERT OR REPLACE INTO runs VALUES (?, ?)',
+                        (key, json.dumps(result)))
+            return result
+
+        self.hits += 1
+        input_tape[:] = result.tape
+        return result._replace(tape=input_tape)
+
+    def get(self, key):
+        result = self.entries.get(key)
+        if result is not None:
+            self.entries.move_to_end(key)
+            return result
+        if self.db is not None:
+            row = self.db.execute('SELECT result FROM runs WHERE key = ?',
+                                  (key,)).fetchone()
+            if row is not None:
+                result = Result(*json.loads(row[0]))
+                self.put(key, result)
+                return result
+        return None
+
+    def put(self, key, result):
+        self.entries[key] = result
+        self.size += self.sizeof(result)
+        while self.size > self.max_bytes and self.entries:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= self.sizeof(evicted)
+            self.evictions += 1
+
+    @staticmethod
+    def sizeof(result):
+        return sys.getsizeof(result.tape) + ENTRY_OVERHEAD
+
+    def stats(self):
+        """Returns the hit and miss counters and the size of the cache."""
+        return {'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'entries': len(self.entries),
+                'bytes': self.size}
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
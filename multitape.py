@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+
+"""Turing machines with several tapes, each with a head of its own.
+
+The programmes of a machine with k tapes have the format of programme_1 and
+programme_2, but every rule reads and writes a tuple of k symbols and moves
+every head on its own ('right', 'left' or 'stay'); instead of the tuple of
+moves, 'halt' halts the machine:
+
+    [(symbol_1, ..., symbol_k), (write_1, ..., write_k),
+     (move_1, ..., move_k), state change]
+
+As in get_index(), the first rule for the scanned symbols is chosen, or the
+last rule of the state if there is none.
+
+With a tape per operand and one for the sum, adding two binary numbers
+takes a number of steps linear in their length (see adder below), whereas
+programme_2 counts one number down and the other up, which takes a number
+of steps exponential in their length. Run this module to compare the two.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from collections import namedtuple
+
+from turing import PROGRAMMES, Result, Tape, get_index, turing_machine
+
+
+MOVES = {'right': 1, 'left': -1, 'stay': 0}
+
+# A multi-tape programme compiled into a transition table, like
+# turing.CompiledProgramme. The rule for state s and the symbol codes
+# c_1, ..., c_k is table[s * width**k + c_1 * width**(k-1) + ... + c_k], a
+# tuple (write codes, moves, next state) in which moves is a tuple of
+# 1, -1 and 0, None for 'halt' or False for an incorrect instruction.
+CompiledMultitape = namedtuple(
+    'CompiledMultitape', ['symbols', 'codes', 'table', 'width', 'tapes',
+                          'states'])
+
+
+def compile_multitape(programme):
+    """Compiles a multi-tape programme into a transition table."""
+    if isinstance(programme, CompiledMultitape):
+        return programme
+
+    states = programme[0]
+    symbols = [None]
+    codes = {str(None): 0}
+    tapes = None
+    for instructions in states:
+        if not instructions:
+            raise ValueError('Every state needs at least one instruction')
+        for rule in instructions:
+            if tapes is None:
+                tapes = len(rule[0])
+            if len(rule[0]) != tapes or len(rule[1]) != tapes:
+                raise ValueError('Every rule must read and write one symbol '
+                                 f'per tape ({tapes})')
+            for symbol in tuple(rule[0]) + tuple(rule[1]):
+                if str(symbol) not in codes:
+                    codes[str(symbol)] = len(symbols)
+                    symbols.append(symbol)
+
+    # get_index() compares the string forms of the tuples of symbols
+    keyed = [[[tuple(str(symbol) for symbol in rule[0])] + list(rule[1:])
+              for rule in instructions] for instructions in states]
+    table = []
+    for state_id, instructions in enumerate(keyed):
+        for combination in _combinations(symbols, tapes):
+            _, write, move, instr = instructions[get_index(
+                instructions, tuple(str(symbol) for symbol in combination))]
+            next_state = state_id + int(instr)
+            if move == 'halt':
+                moves = None
+            elif len(move) == tapes and all(m in MOVES for m in move) and \
+                    0 <= next_state < len(states):
+                moves = tuple(MOVES[m] for m in move)
+            else:
+                moves = False
+            table.append((tuple(codes[str(symbol)] for symbol in write),
+                          moves, next_state))
+
+    return CompiledMultitape(tuple(symbols), codes, table, len(symbols),
+                             tapes, len(states))
+
+
+def _combinations(symbols, tapes):
+    if tapes == 0:
+        yield ()
+        return
+    for symbol in symbols:
+        for rest in _combinations(symbols, tapes - 1):
+            yield (symbol,) + rest
+
+
+def multitape_machine(input_tapes, programme, heads=None, state_id=0,
+                      max_steps=None):
+    """Runs a multi-tape programme and returns a Result.
+
+    The tapes are changed in place; the tape and head of the Result are
+    the lists of all the tapes and heads. As in turing_machine(), the tapes
+    grow in both directions on demand, and each list starts at cell 0 or
+    at the leftmost cell that is not blank.
+    """
+    compiled = compile_multitape(programme)
+    codes, symbols, table = compiled.codes, compiled.symbols, compiled.table
+    width, count = compiled.width, compiled.tapes
+    if len(input_tapes) != count:
+        raise ValueError(f'The programme needs {count} tapes')
+    try:
+        tapes = [Tape(bytes(codes[str(symbol)] for symbol in input_tape))
+                 for input_tape in input_tapes]
+    except KeyError as error:
+        raise ValueError(f'The symbol {error.args[0]} is not part of the '
+                         f'alphabet of the programme') from None
+    heads = list(heads or [0] * count)
+    indices = range(count)
+
+    steps = 0
+    reason = 'max_steps'
+    while steps != max_steps:
+        index = 0
+        for tape, head in zip(tapes, heads):
+            index = index * width + tape[head]
+        writes, moves, state_id = table[state_id * width ** count + index]
+        for i in indices:
+            tapes[i][heads[i]] = writes[i]
+        steps += 1
+        if not moves:
+            reason = 'halt' if moves is None else 'error'
+            break
+        for i in indices:
+            heads[i] += moves[i]
+
+    results = []
+    for i in indices:
+        start, stop = tapes[i].bounds()
+        start, stop = min(start, heads[i]), max(stop, heads[i] + 1)
+        input_tapes[i][:] = [symbols[code] for code in tapes[i].read(start,
+                                                                     stop)]
+        heads[i] -= start
+        results.append(input_tapes[i])
+    return Result(results, heads, state_id, steps, reason)
+
+
+def _adder():
+    """Builds the programme of the three-tape adder."""
+    symbols = [0, 1, 'start', None]
+
+    def value(symbol):
+        return symbol if symbol in (0, 1) else 0
+
+    # state_0: move the heads of both numbers to the blank after their last
+    # digit; the head of the sum moves along with the longer number.
+    # Then step back onto the last digits and add with a carry of 0.
+    find_ends = []
+    for x in symbols:
+        for y in symbols:
+            if x is None and y is None:
+                find_ends.append([(x, y, None), (x, y, None),
+                                  ('left', 'left', 'stay'), 1])
+            else:
+                find_ends.append([(x, y, None), (x, y, None),
+                                  ('stay' if x is None else 'right',
+                                   'stay' if y is None else 'right',
+                                   'right'), 0])
+
+    # state_1 and state_2: add the digits under the heads and the carry of
+    # 0 (state_1) or 1 (state_2), write the digit of the sum and move the
+    # heads left. 'start' and blanks count as 0 once a number has ended,
+    # and the head of a number that has ended stays where it is; when both
+    # have ended, the carry is the first digit of the sum.
+    add = []
+    for carry in (0, 1):
+        rules = []
+        for x in symbols:
+            for y in symbols:
+                if x in (0, 1) or y in (0, 1):
+                    total = value(x) + value(y) + carry
+                    rules.append([(x, y, None), (x, y, total % 2),
+                                  ('left' if x in (0, 1) else 'stay',
+                                   'left' if y in (0, 1) else 'stay',
+                                   'left'),
+                                  total // 2 - carry])
+                else:
+                    rules.append([(x, y, None), (x, y, carry),
+                                  ('stay', 'stay', 'left'), 2 - carry])
+        add.append(rules)
+
+    # state_3: mark the start of the sum and halt.
+    finish = [[(x, y, None), (x, y, 'start'), 'halt', 0]
+              for x in ('start', None) for y in ('start', None)]
+
+    return [[find_ends] + add + [finish]]
+
+
+# Adds two binary numbers on three tapes in a number of steps linear in
+# their length. The tapes should look like this:
+# ('start', 1, 0, 1), ('start', 1, 1), ()
+# and the sum is written on the third tape: ('start', 1, 0, 0, 0).
+adder = _adder()
+
+
+def number(digits):
+    """Returns the value of a binary number, ignoring non-digits."""
+    return int(''.join(str(d) for d in digits if d in (0, 1)) or '0', 2)
+
+
+def compare(bits, max_steps, rng):
+    """Adds two random numbers with programme_2 and with the adder."""
+    a = [rng.randint(0, 1) for _ in range(bits)]
+    b = [rng.randint(0, 1) for _ in range(bits)]
+    report = {'bits': bits}
+
+    start = time.perf_counter()
+    single = turing_machine(['start'] + a + [None] + b,
+                            PROGRAMMES['programme_2'], 0, 0, max_steps)
+    report['programme_2'] = {'steps': single.steps, 'reason': single.reason,
+                             'wall_time': time.perf_counter() - start}
+
+    start = time.perf_counter()
+    multi = multitape_machine([['start'] + a, ['start'] + b, []], adder,
+                              max_steps=max_steps)
+    report['adder'] = {'steps': multi.steps, 'reason': multi.reason,
+                       'wall_time': time.perf_counter() - start}
+
+    if single.reason == 'halt':
+        second = single.tape[single.tape.index(None) + 1:]
+        report['agree'] = number(second) == number(multi.tape[2])
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Compare the three-tape adder with programme_2.')
+    parser.add_argument('--sizes', nargs='+', type=int,
+                        default=[4, 8, 12, 16, 64, 1024, 100000],
+                        help='bit lengths of the numbers to add')
+    parser.add_argument('--max-steps', type=int, default=10 ** 7,
+                        help='step limit of every run')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    for bits in args.sizes:
+        json.dump(compare(bits, args.max_steps, random.Random(args.seed)),
+                  sys.stdout)
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+
+"""Profiles where the steps of a Turing machine go.
+
+A Profiler counts the steps per rule of the transition table, i.e. per
+state and scanned symbol. By default it switches the machine to the copy of
+its hot loop that increments a counter array on every step (and adds a
+whole sweep at once); with `sample`, the machine keeps running on the plain
+loop and the rule under the head is only recorded every `sample` steps,
+which costs next to nothing.
+
+profile() also times the phases of a run (compiling the programme, loading
+the tape, running the machine and reading the tape back) and the report
+can be written as JSON or in the collapsed stack format understood by
+flamegraph.pl and speedscope:
+
+    python profiling.py --programme programme_2 --format collapsed
+"""
+
+import argparse
+import ast
+import json
+import sys
+import time
+
+from turing import (Machine, PROGRAMMES, Tracer, compile_programme,
+                    head_init, state_init, tape)
+
+
+MOVE_NAMES = {1: 'right', -1: 'left', 0: 'halt', None: 'error'}
+
+
+class Profiler(Tracer):
+    """Counts the steps per rule of a running machine."""
+
+    def __init__(self, sample=None):
+        self.sample = sample
+        self.every = sample or 0
+
+    def start(self, machine):
+        self.machine = machine
+        self.counts = [0] * len(machine.programme.table)
+        if not self.sample:
+            machine.counts = self.counts
+
+    def step(self, machine):
+        if machine.reason is None:
+            self.counts[machine.state * machine.programme.width +
+                        machine.cells[machine.head]] += self.sample
+
+    def finish(self, result=None):
+        self.machine.counts = None
+
+    def report(self):
+        """Returns the counts, head travel and tape usage as a dict.
+
+        'tape_extent' is the number of cells that were prepared or are not
+        blank at the end, not the number of cells the head visited.
+        """
+        machine = self.machine
+        programme = machine.programme
+        rules = []
+        states = [0] * programme.states
+        travel = 0
+        for index, count in enumerate(self.counts):
+            if not count:
+                continue
+            state_id, code = divmod(index, programme.width)
+            write, move, next_state = programme.table[index]
+            states[state_id] += count
+            if move:
+                travel += count
+            rules.append({
+                'state': state_id,
+                'symbol': programme.symbols[code],
+                'write': programme.symbols[write],
+                'move': MOVE_NAMES[move],
+                'next_state': next_state,
+                'sweep': programme.sweeps[index] is not None,
+                'count': count,
+            })
+        rules.sort(key=lambda rule: -rule['count'])
+        start, stop = machine.cells.bounds()
+        return {
+            'steps': machine.steps,
+            'sampled': bool(self.sample),
+            'head_travel': travel,
+            'tape_extent': stop - start,
+            'pages': len(machine.cells.pages),
+            'states': states,
+            'rules': rules,
+        }
+
+
+def profile(input_tape, programme, head_id=0, state_id=0, max_steps=None,
+            sample=None):
+    """Runs a programme under a Profiler and times the phases of the run.
+
+    Returns the Result and the report of the Profiler, with the time spent
+    per phase in seconds under 'phases'.
+    """
+    phases = {}
+    start = time.perf_counter()
+    compiled = compile_programme(programme)
+    phases['compile'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    machine = Machine(compiled, input_tape, head_id, state_id)
+    phases['load'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    profiler = Profiler(sample)
+    profiler.start(machine)
+    while machine.reason is None:
+        budget = None if max_steps is None else max_steps - machine.steps
+        if budget == 0:
+            break
+        chunk = sample or budget
+        if budget is not None:
+            chunk = min(chunk, budget)
+        machine.run(chunk)
+        if sample:
+            profiler.step(machine)
+    profiler.finish()
+    phases['run'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = machine.result('max_steps')
+    phases['decode'] = time.perf_counter() - start
+
+    report = profiler.report()
+    report['phases'] = phases
+    return result, report
+
+
+def collapsed(report, name='programme'):
+    """Returns a report in the collapsed stack format of flame graphs."""
+    return ''.join(
+        f"{name};state_{rule['state']};{rule['symbol']}->{rule['write']} "
+        f"{rule['move']} {rule['count']}\n" for rule in report['rules'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Profile the steps of a Turing machine per rule.')
+    parser.add_argument('--programme', choices=sorted(PROGRAMMES),
+                        default='programme_2')
+    parser.add_argument('--tape', type=ast.literal_eval, default=tape,
+                        help='the tape as a Python list')
+    parser.add_argument('--max-steps', type=int,
+                        help='stop the machine after this many steps')
+    parser.add_argument('--sample', type=int,
+                        help='sample the rule every SAMPLE steps instead of '
+                             'counting every step')
+    parser.add_argument('--format', choices=['json', 'collapsed'],
+                        default='json')
+    args = parser.parse_args(argv)
+
+    _, report = profile(list(args.tape), PROGRAMMES[args.programme],
+                        head_init, state_init, args.max_steps, args.sample)
+    if args.format == 'json':
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        sys.stdout.write(collapsed(report, args.programme))
+
+
+if __name__ == '__main__':
+    main()
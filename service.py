@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+
+"""Runs Turing machines from asyncio code.
+
+A Service executes machines on a pool of worker processes so that the event
+loop stays responsive however long a programme runs. Every job is run in
+chunks of a fixed number of steps: between two chunks the machine comes
+back to the event loop, which reports its progress, checks the deadline of
+the job and notices when the job was cancelled. A job therefore never takes
+more than one chunk of work past its cancellation or deadline. Nothing is
+printed and nothing exits; every outcome of a run is a Result, e.g.
+
+    async with Service() as service:
+        result = await service.run(programme_2, tape, max_steps=10**6)
+
+At most concurrency jobs run at once. Further calls of run() wait for a
+running job to finish, which applies backpressure to whoever submits them.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from batch import read_tapes
+from turing import PROGRAMMES, CycleDetector, Machine, run_machine
+
+
+# The configuration of a running machine, reported between the chunks of a job.
+Progress = namedtuple('Progress', ['steps', 'head', 'state'])
+
+class _Detector(CycleDetector):
+    """A CycleDetector that carries on across the chunks of a job.
+
+    It travels to the worker and back with the machine, so its snapshot
+    survives from one chunk to the next.
+    """
+
+    def start(self, machine):
+        if not hasattr(self, 'snapshot'):
+            super().start(machine)
+
+
+def _advance(machine, max_steps, detector):
+    """Runs a machine up to max_steps steps in a worker and returns it
+    together with its cycle detector (or None)."""
+    run_machine(machine, max_steps, detector)
+    return machine, detector
+
+
+class Service:
+    """Runs machines on an executor, concurrency jobs at a time.
+
+    The executor is a ProcessPoolExecutor with the given number of workers
+    unless one is passed in. An executor passed in must work on copies of
+    the machine, as a process pool does: a job past its deadline reports
+    the machine as it was before its last chunk while the chunk may still
+    be running. chunk is the number of steps a machine performs before it
+    comes back to the event loop.
+    """
+
+    def __init__(self, workers=None, concurrency=None, executor=None,
+                 chunk=1 << 20):
+        self.own_executor = executor is None
+        self.executor = executor or ProcessPoolExecutor(workers)
+        if concurrency is None:
+            concurrency = getattr(self.executor, '_max_workers', 1)
+        self.limit = asyncio.Semaphore(concurrency)
+        self.chunk = chunk
+
+    async def events(self, programme, input_tape, head_id=0, state_id=0,
+                     max_steps=None, deadline=None, every=None,
+                     detect_cycles=False):
+        """Runs a machine and yields its Progress every every steps.
+
+        The last item yielded is the Result of the run. deadline is the
+        number of seconds the job may take, counted from the moment it
+        starts running; a job past its deadline stops with reason
+        'deadline' in the last configuration the loop has seen. Progress is
+        reported between the chunks of the job, so every is rounded up to a
+        multiple of the chunk and the chunk is reduced to every if smaller.
+        With detect_cycles, one CycleDetector watches the whole run.
+        """
+        loop = asyncio.get_running_loop()
+        step = min(self.chunk, every or self.chunk)
+        # The programme is compiled for every job: it travels to the
+        # workers with the machine after every chunk anyway.
+        machine = Machine(programme, input_tape, head_id, state_id)
+        detector = _Detector() if detect_cycles else None
+        async with self.limit:
+            end = None if deadline is None else loop.time() + deadline
+            reported = 0
+            while machine.reason is None and machine.steps != max_steps:
+                target = machine.steps + step
+                if max_steps is not None:
+                    target = min(target, max_steps)
+                work = loop.run_in_executor(self.executor, _advance, machine,
+                                            target, detector)
+                try:
+                    timeout = None if end is None else end - loop.time()
+                    machine, detector = await asyncio.wait_for(work, timeout)
+                except asyncio.TimeoutError:
+                    yield machine.result('deadline')
+                    return
+                if every and machine.steps - reported >= every:
+                    reported = machine.steps
+                    yield Progress(machine.steps, machine.head, machine.state)
+        yield machine.result('max_steps')
+
+    async def run(self, programme, input_tape, head_id=0, state_id=0,
+                  max_steps=None, deadline=None, every=None, progress=None,
+                  detect_cycles=False):
+        """Runs a machine and returns its Result.
+
+        The input tape is not changed. With every, progress is called with
+        the Progress of the machine every every steps (see events()).
+        """
+        async for event in self.events(programme, input_tape, head_id,
+                                       state_id, max_steps, deadline, every,
+                                       detect_cycles):
+            if isinstance(event, Progress) and progress is not None:
+                progress(event)
+        return event
+
+    def close(self):
+        if self.own_executor:
+            self.executor.shutdown(cancel_futures=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+
+async def run_all(service, programme, tapes, **options):
+    """Runs a programme over every tape and yields the Results in order."""
+    jobs = [asyncio.ensure_future(service.run(programme, tape, **options))
+            for tape in tapes]
+    try:
+        for job in jobs:
+            yield await job
+    finally:
+        for job in jobs:
+            job.cancel()
+
+
+async def serve(args):
+    lines = sys.stdin if args.tapes == '-' else open(args.tapes)
+    with lines:
+        tapes = list(read_tapes(lines))
+    async with Service(args.workers, args.concurrency,
+                       chunk=args.chunk) as service:
+        async for result in run_all(service, PROGRAMMES[args.programme],
+                                    tapes, max_steps=args.max_steps,
+                                    deadline=args.deadline,
+                                    detect_cycles=args.detect_cycles):
+            print(json.dumps(result._asdict()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Run Turing machines concurrently from an event loop.')
+    parser.add_argument('tapes', nargs='?', default='-',
+                        help='file with one tape per line (default: stdin)')
+    parser.add_argument('--programme', choices=sorted(PROGRAMMES),
+                        default='programme_2')
+    parser.add_argument('--max-steps', type=int,
+                        help='stop a run after this many steps')
+    parser.add_argument('--deadline', type=float,
+                        help='stop a run after this many seconds')
+    parser.add_argument('--workers', type=int,
+                        help='number of worker processes (default: all CPUs)')
+    parser.add_argument('--concurrency', type=int,
+                        help='number of runs at once (default: workers)')
+    parser.add_argument('--chunk', type=int, default=1 << 20,
+                        help='steps between two checks of the event loop')
+    parser.add_argument('--detect-cycles', action='store_true',
+                        help='stop machines that provably never halt')
+    asyncio.run(serve(parser.parse_args(argv)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+
+"""Runs the Turing machine on tapes that do not fit into memory.
+
+The tape is read from a file or a pipe as symbols separated by whitespace,
+written the same way as in the text format of loader.py:
+
+    start 1 0 1 None 1 1
+
+and stored as one byte per cell (the symbol code) in a file that is mapped
+into memory. Only a bounded number of pages of the tape is kept in the
+machine's own memory; the others are written back to the mapped file, so
+the resident memory is bounded by the page cache of the operating system
+rather than by the length of the tape. The result is written out as a
+stream of symbols in the same format.
+
+    python streaming.py --programme programme_1 input.txt output.txt
+"""
+
+import argparse
+import mmap
+import os
+import re
+import sys
+import tempfile
+from collections import OrderedDict
+
+from loader import parse_symbol
+from turing import (Machine, PROGRAMMES, Result, Tape, compile_programme,
+                    head_init, state_init)
+
+
+# The number of bytes read, written or scanned at once.
+CHUNK = 1 << 20
+
+NON_BLANK = re.compile(rb'[^\x00]')
+
+
+class MappedTape(Tape):
+    """A Tape whose cells from 0 onwards are kept in a memory-mapped file.
+
+    At most `resident` pages are held as bytearrays for the machine to work
+    on; the least recently used one is written back to the file when
+    another page is needed. Pages left of cell 0 stay in memory.
+    """
+
+    def __init__(self, path, page_bits=16, resident=256):
+        super().__init__(page_bits=page_bits)
+        self.pages = OrderedDict()
+        self.resident = max(resident, 2)
+        self.file = open(path, 'r+b')
+        self.length = self.size = os.fstat(self.file.fileno()).st_size
+        self.map = mmap.mmap(self.file.fileno(), 0) if self.size else None
+
+    def stored(self, number):
+        """Returns the cells of a page as stored in the file."""
+        start = number << self.page_bits
+        if number < 0 or start >= self.size:
+            return None
+        return self.map[start:start + self.page_size].ljust(self.page_size,
+                                                              b'\0')
+
+    def page(self, number):
+        self.dirty.add(number)
+        page = self.pages.get(number)
+        if page is not None:
+            self.pages.move_to_end(number)
+            return page
+        stored = self.stored(number)
+        page = self.pages[number] = bytearray(
+            self.page_size if stored is None else stored)
+        if len(self.pages) > self.resident:
+            for oldest in self.pages:
+                if 0 <= oldest != number:
+                    self.store(oldest, self.pages.pop(oldest))
+                    break
+        return page
+
+    def peek(self, number):
+        page = self.pages.get(number)
+        return self.stored(number) if page is None else page
+
+    def store(self, number, page):
+        """Writes a page back to the file, growing the file if needed."""
+        start = number << self.page_bits
+        if start + self.page_size > self.size:
+            if self.map is not None:
+                self.map.close()
+            self.size = max(start + self.page_size, 2 * self.size)
+            self.file.truncate(self.size)
+            self.map = mmap.mmap(self.file.fileno(), 0)
+        self.map[start:start + self.page_size] = page
+
+    def flush(self):
+        """Writes all pages in memory back to the file."""
+        for number, page in self.pages.items():
+            if number >= 0:
+                self.store(number, page)
+
+    def bounds(self):
+        self.flush()
+        start, stop = 0, self.length
+        for number, page in self.pages.items():
+            if number < 0 and page.strip(b'\0'):
+                start = min(start, (number << self.page_bits) + len(page) -
+                            len(page.lstrip(b'\0')))
+        if self.map is not None and NON_BLANK.search(self.map):
+            end = self.size
+            while end > 0:
+                offset = max(0, end - CHUNK)
+                cells = self.map[offset:end].rstrip(b'\0')
+                if cells:
+                    stop = max(stop, offset + len(cells))
+                    break
+                end = offset
+        return start, stop
+
+    def close(self):
+        self.flush()
+        if self.map is not None:
+            self.map.close()
+        self.file.close()
+
+
+def read_symbols(stream):
+    """Yields the symbols of a tape read from a text stream, chunk by chunk.
+    """
+    rest = ''
+    while True:
+        chunk = stream.read(CHUNK)
+        if not chunk:
+            break
+        tokens = (rest + chunk).split()
+        rest = '' if chunk[-1].isspace() or not tokens else tokens.pop()
+        yield from map(parse_symbol, tokens)
+    if rest:
+        yield parse_symbol(rest)
+
+
+def write_cells(compiled, stream, path):
+    """Writes the codes of the symbols of a text stream to a cell file."""
+    codes = compiled.codes
+    with open(path, 'wb') as cells:
+        chunk = bytearray()
+        for symbol in read_symbols(stream):
+            try:
+                chunk.append(codes[str(symbol)])
+            except KeyError:
+                raise ValueError(f'The symbol {symbol} is not part of the '
+                                 f'alphabet of the programme') from None
+            if len(chunk) == CHUNK:
+                cells.write(chunk)
+                chunk.clear()
+        cells.write(chunk)
+
+
+def write_symbols(compiled, tape, start, stop, stream):
+    """Writes the cells from start to stop to a text stream, chunk by chunk.
+    """
+    symbols = [str(symbol) for symbol in compiled.symbols]
+    separator = ''
+    while start < stop:
+        cells = tape.read(start, min(stop, start + CHUNK))
+        stream.write(separator + ' '.join(symbols[code] for code in cells))
+        separator = ' '
+        start += len(cells)
+    stream.write('\n')
+
+
+def stream_machine(input_stream, output_stream, programme, head_id=0,
+                   state_id=0, max_steps=None, cells=None, resident=256):
+    """Runs a programme over a tape read from input_stream.
+
+    The result tape is written to output_stream instead of being returned
+    in the Result, whose head position is an index into the written tape.
+    The cells are kept in the file `cells` (a temporary file by default).
+    """
+    compiled = compile_programme(programme)
+    temporary = cells is None
+    if temporary:
+        handle, cells = tempfile.mkstemp(suffix='.cells')
+        os.close(handle)
+    try:
+        write_cells(compiled, input_stream, cells)
+        machine = Machine(compiled, [], head_id, state_id)
+        machine.cells = MappedTape(cells, resident=resident)
+        try:
+            machine.run(max_steps)
+            start, stop = machine.bounds()
+            write_symbols(compiled, machine.cells, start, stop,
+                          output_stream)
+        finally:
+            machine.cells.close()
+    finally:
+        if temporary:
+            os.remove(cells)
+    return Result(None, machine.head - start, machine.state, machine.steps,
+                  machine.reason or 'max_steps')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Run a Turing machine on a tape streamed from a file.')
+    parser.add_argument('input', nargs='?', default='-',
+                        help='file with the tape (default: stdin)')
+    parser.add_argument('output', nargs='?', default='-',
+                        help='file for the result (default: stdout)')
+    parser.add_argument('--programme', choices=sorted(PROGRAMMES),
+                        default='programme_1')
+    parser.add_argument('--max-steps', type=int,
+                        help='stop the machine after this many steps')
+    parser.add_argument('--cells', help='file to keep the cells in '
+                                        '(default: a temporary file)')
+    parser.add_argument('--resident', type=int, default=256,
+                        help='pages of 64 KiB kept in memory')
+    args = parser.parse_args(argv)
+
+    input_stream = sys.stdin if args.input == '-' else open(args.input)
+    output_stream = sys.stdout if args.output == '-' else \
+        open(args.output, 'w')
+    with input_stream, output_stream:
+        result = stream_machine(input_stream, output_stream,
+                                PROGRAMMES[args.programme], head_init,
+                                state_init, args.max_steps, args.cells,
+                                args.resident)
+    print(f'The machine stopped ({result.reason}) in state {result.state} '
+          f'after {result.steps} steps with the head at index '
+          f'{result.head}.', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
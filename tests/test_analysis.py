@@ -0,0 +1,41 @@
+import copy
+import random
+
+from analysis import optimise, validate
+from turing import programme_1, programme_2, turing_machine
+
+
+def severities(issues):
+    return {(issue.state, issue.rule, issue.severity) for issue in issues}
+
+
+def test_validate_finds_problems():
+    programme = [[[[0, 0, 'up', 'x'], [1, 1, 'right', 5], [1, 0, 'left', 0]],
+                  []]]
+    found = severities(validate(programme))
+    assert (0, 0, 'invalid') in found
+    assert (0, 0, 'error') in found
+    assert (0, 1, 'error') in found
+    assert (0, 2, 'warning') in found
+    assert (1, None, 'invalid') in found
+
+
+def test_validate_reports_unreachable_states():
+    programme = copy.deepcopy(programme_1)
+    programme[0].append([[None, None, 'halt', 0]])
+    assert (2, None, 'warning') in severities(validate(programme))
+
+
+def test_optimise_merges_duplicate_states():
+    programme = [programme_2[0] + copy.deepcopy(programme_2[0])]
+    optimised, report = optimise(programme)
+    assert report.states == 18
+    assert report.merged <= 9
+    rng = random.Random(0)
+    for _ in range(20):
+        tape = (['start'] + [rng.randint(0, 1) for _ in range(4)] + [None] +
+                [rng.randint(0, 1) for _ in range(4)])
+        expected = turing_machine(list(tape), programme, 0, 0)
+        result = turing_machine(list(tape), optimised, 0, 0)
+        assert (result.tape, result.head, result.steps, result.reason) == \
+            (expected.tape, expected.head, expected.steps, expected.reason)
@@ -0,0 +1,19 @@
+from batch import BatchResult, read_tapes, run_batch
+from turing import programme_2, turing_machine
+
+
+def test_batch_matches_single_runs():
+    tapes = list(read_tapes(["['start', 1, 0, None, 1]\n", '\n',
+                             "['start', 1, 1, None, 1, 1]\n"]))
+    results = list(run_batch(programme_2, tapes, processes=2, chunksize=1))
+    for tape, result in zip(tapes, results):
+        expected = turing_machine(list(tape), programme_2, 0, 0)
+        assert result == BatchResult(tape, expected.tape, expected.steps,
+                                     expected.reason)
+
+
+def test_bad_tape_does_not_end_batch():
+    tapes = [['start', 1, 0, 2], ['start', 1, None, 1]]
+    results = list(run_batch(programme_2, tapes, processes=1))
+    assert results[0] == BatchResult(tapes[0], None, 0, 'invalid')
+    assert results[1].reason == 'halt'
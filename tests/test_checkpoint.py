@@ -0,0 +1,65 @@
+import threading
+
+import pytest
+
+import checkpoint
+from turing import (Machine, Tape, programme_2, run_machine,
+                    turing_machine)
+
+
+TAPE = ['start', 1, 0, 1, 1, 0, 1, 1, None] + [1] * 200
+
+
+def small_pages(machine):
+    machine.cells = Tape(machine.cells.read(0, len(TAPE)), page_bits=4)
+    return machine
+
+
+@pytest.mark.parametrize('stop', [1, 1000, 20000])
+def test_checkpoint_resume(tmp_path, stop):
+    path = str(tmp_path / 'run.ckpt')
+    expected = turing_machine(list(TAPE), programme_2, 0, 0)
+    assert stop < expected.steps
+
+    machine = small_pages(Machine(programme_2, TAPE))
+    run_machine(machine, stop,
+                checkpoint.Checkpointer(path, interval=300, every=100))
+    loaded = checkpoint.load(path)
+    assert (loaded.steps, loaded.head, loaded.state) == \
+        (machine.steps, machine.head, machine.state)
+    assert loaded.tape() == machine.tape()
+    assert run_machine(loaded) == expected
+
+
+def test_checkpoint_append(tmp_path):
+    path = str(tmp_path / 'run.ckpt')
+    machine = small_pages(Machine(programme_2, TAPE))
+    checkpoint.save(machine, path)
+    machine.run(500)
+    checkpoint.append(machine, path)
+    saved = (machine.steps, machine.head, machine.state, machine.tape())
+    machine.run(500)
+    checkpoint.append(machine, path)
+
+    loaded = checkpoint.load(path)
+    assert (loaded.steps, loaded.head, loaded.state, loaded.tape()) == \
+        (machine.steps, machine.head, machine.state, machine.tape())
+
+    # A record cut short by a crash is ignored.
+    with open(path, 'rb') as file:
+        data = file.read()
+    with open(path, 'wb') as file:
+        file.write(data[:-10])
+    loaded = checkpoint.load(path)
+    assert (loaded.steps, loaded.head, loaded.state, loaded.tape()) == saved
+
+
+def test_checkpointer_in_thread(tmp_path):
+    path = str(tmp_path / 'run.ckpt')
+    results = []
+    thread = threading.Thread(target=lambda: results.append(run_machine(
+        Machine(programme_2, TAPE), 1000, checkpoint.Checkpointer(path))))
+    thread.start()
+    thread.join()
+    assert results[0].steps == 1000
+    assert checkpoint.load(path).steps == 1000
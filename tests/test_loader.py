@@ -0,0 +1,53 @@
+import struct
+
+import pytest
+
+from loader import (dump_binary, dump_text, load_binary, load_programme,
+                    parse_text)
+from turing import compile_programme, programme_1, programme_2
+
+
+def test_text_round_trip():
+    assert parse_text(dump_text(programme_2)) == programme_2
+
+
+def test_binary_round_trip():
+    compiled = compile_programme(programme_2)
+    loaded = load_binary(dump_binary(programme_2))
+    assert loaded.table == compiled.table
+    assert loaded.symbols == compiled.symbols
+    assert loaded.sweeps == compiled.sweeps
+
+
+def set_next_state(data, index, state):
+    """Returns data with the next state of rule `index` replaced."""
+    offset = len(data) - 4 * len(compile_programme(programme_1).table)
+    offset += 4 * index
+    return data[:offset] + struct.pack('<i', state) + data[offset + 4:]
+
+
+@pytest.mark.parametrize('change', [
+    lambda data: data[:-8],
+    lambda data: data[:7],
+    lambda data: data + b'\0',
+    lambda data: set_next_state(data, 1, 50),
+    lambda data: set_next_state(data, 1, -1),
+])
+def test_damaged_binary_rejected(change):
+    with pytest.raises(ValueError):
+        load_binary(change(dump_binary(programme_1)))
+
+
+def test_damaged_cache_recompiled(tmp_path):
+    source = tmp_path / 'programme.txt'
+    source.write_text(dump_text(programme_1))
+    cache = tmp_path / 'cache'
+    compiled = load_programme(str(source), str(cache))
+    entry, = cache.iterdir()
+    entry.write_bytes(entry.read_bytes()[:-8])
+    assert load_programme(str(source), str(cache)).table == compiled.table
+
+
+def test_unknown_move_rejected():
+    with pytest.raises(ValueError):
+        parse_text('state_0:\n0 0 up 0\n')
@@ -0,0 +1,39 @@
+import copy
+
+from memo import RunCache
+from turing import compile_programme, programme_1, programme_2, turing_machine
+
+
+def test_repeated_runs_hit():
+    cache = RunCache()
+    tape = ['start', 1, 0, 1, None, 1, 1]
+    expected = turing_machine(list(tape), programme_2, 0, 0)
+    for _ in range(3):
+        assert cache.run(list(tape), programme_2) == expected
+    assert cache.stats()['hits'] == 2
+    assert len(cache.programmes) == 1
+
+
+def test_programme_changed_in_place():
+    cache = RunCache()
+    programme = copy.deepcopy(programme_1)
+    tape = ['start', 1, 0, 1]
+    cache.run(list(tape), programme)
+    programme[0][1][1] = [1, 1, 'halt', 0]
+    expected = turing_machine(list(tape), programme, 0, 0)
+    assert cache.run(list(tape), programme) == expected
+    assert cache.stats()['misses'] == 2
+
+
+def test_compiled_programmes(tmp_path):
+    path = str(tmp_path / 'runs.db')
+    compiled = compile_programme(programme_2)
+    tape = ['start', 1, 1, None, 1]
+    cache = RunCache(path=path)
+    expected = cache.run(list(tape), compiled)
+    cache.close()
+
+    cache = RunCache(path=path)
+    assert cache.run(list(tape), programme_2) == expected
+    assert cache.stats()['hits'] == 1
+    cache.close()
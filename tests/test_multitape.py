@@ -0,0 +1,28 @@
+import random
+
+import pytest
+
+from multitape import adder, multitape_machine, number
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_adder(seed):
+    rng = random.Random(seed)
+    a = [1] + [rng.randint(0, 1) for _ in range(rng.randint(0, 8))]
+    b = [1] + [rng.randint(0, 1) for _ in range(rng.randint(0, 8))]
+    tapes = [['start'] + a, ['start'] + b, []]
+    result = multitape_machine(tapes, adder)
+    assert result.reason == 'halt'
+    assert result.steps == 2 * max(len(a), len(b)) + 4
+    # The operands are left as they were, and the sum starts at cell 0.
+    assert tapes[0] == ['start'] + a
+    assert tapes[1] == ['start'] + b
+    assert tapes[2][0] == 'start'
+    assert number(tapes[2]) == number(a) + number(b)
+    assert all(0 <= head < len(tape)
+               for head, tape in zip(result.head, result.tape))
+
+
+def test_wrong_number_of_tapes():
+    with pytest.raises(ValueError):
+        multitape_machine([['start', 1]], adder)
@@ -0,0 +1,23 @@
+from profiling import collapsed, profile
+from turing import programme_1
+
+
+def test_profile_counts_sweeps_per_rule():
+    result, report = profile(['start', 1, 0, 1, 1, 0, None], programme_1)
+    counts = {(rule['state'], rule['symbol']): rule['count']
+              for rule in report['rules']}
+    assert counts == {(0, 'start'): 1, (0, 0): 2, (0, 1): 3, (0, None): 1,
+                      (1, 0): 1}
+    assert sum(counts.values()) == result.steps == report['steps']
+
+
+def test_sampled_profile_and_collapsed_output():
+    tape = ['start', 1, 0, 1, 1, 0, None]
+    result, report = profile(tape, programme_1, sample=1)
+    assert report['sampled']
+    # Every sample records the rule under the head for the next step.
+    sampled = sum(rule['count'] for rule in report['rules'])
+    assert result.steps - 1 <= sampled <= result.steps
+    lines = collapsed(report, 'programme_1').splitlines()
+    assert len(lines) == len(report['rules'])
+    assert all(line.startswith('programme_1;state_') for line in lines)
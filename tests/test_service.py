@@ -0,0 +1,50 @@
+import asyncio
+import copy
+
+from service import Progress, Service
+from turing import programme_1, programme_2, turing_machine
+
+
+PING_PONG = [[[[None, None, 'right', 1]], [[None, None, 'left', -1]]]]
+
+
+def serve(job, **options):
+    async def main():
+        async with Service(1, **options) as service:
+            return await job(service)
+    return asyncio.run(main())
+
+
+def test_run_matches_turing_machine():
+    tape = ['start', 1, 0, None, 1, 1]
+    expected = turing_machine(list(tape), programme_2, 0, 0)
+    assert serve(lambda service: service.run(programme_2, tape),
+                 chunk=64) == expected
+
+
+def test_progress_and_cycles():
+    events = []
+    result = serve(lambda service: service.run(
+        PING_PONG, [None], max_steps=10 ** 9, every=32768,
+        progress=events.append, detect_cycles=True))
+    assert result.reason == 'non-halting'
+    assert result.steps == 65536
+    assert events[0] == Progress(32768, 0, 0)
+
+
+def test_deadline():
+    result = serve(lambda service: service.run(
+        PING_PONG, [None], max_steps=10 ** 12, deadline=0.2), chunk=4096)
+    assert result.reason == 'deadline'
+
+
+def test_programme_changed_between_jobs():
+    programme = copy.deepcopy(programme_1)
+    tape = ['start', 1, 0, 1]
+
+    async def job(service):
+        await service.run(programme, tape)
+        programme[0][1][1] = [1, 1, 'halt', 0]
+        return await service.run(programme, tape)
+
+    assert serve(job) == turing_machine(list(tape), programme, 0, 0)
@@ -0,0 +1,47 @@
+import io
+import random
+
+import pytest
+
+from streaming import MappedTape, parse_symbol, stream_machine, write_cells
+from turing import (Machine, compile_programme, programme_1, programme_2,
+                    turing_machine)
+
+
+def test_stream_round_trip():
+    tape = ['start', 1, 0, 1, None, 1, 1]
+    expected = turing_machine(list(tape), programme_2, 0, 0)
+    output = io.StringIO()
+    result = stream_machine(io.StringIO(' '.join(map(str, tape))), output,
+                            programme_2)
+    assert [parse_symbol(token) for token in output.getvalue().split()] == \
+        expected.tape
+    assert result[1:] == expected[1:]
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_small_pages_match_memory(tmp_path, seed):
+    # Pages of four cells, two of them in memory: the head keeps leaving
+    # the resident pages, including into the cells left of 0.
+    rng = random.Random(seed)
+    compiled = compile_programme(programme_1)
+    if seed % 2:
+        # Adding 1 to all ones carries on left of the start of the tape.
+        tape = ['start'] + [1] * 30
+    else:
+        tape = ['start'] + [rng.randint(0, 1) for _ in range(30)] + [0]
+    expected = turing_machine(list(tape), compiled, 0, 0, 500)
+    path = str(tmp_path / 'tape.cells')
+    write_cells(compiled, io.StringIO(' '.join(map(str, tape))), path)
+    machine = Machine(compiled, [])
+    machine.cells = MappedTape(path, page_bits=2, resident=2)
+    try:
+        machine.run(500)
+        assert machine.result('max_steps') == expected
+    finally:
+        machine.cells.close()
+
+
+def test_unknown_symbol_rejected():
+    with pytest.raises(ValueError):
+        stream_machine(io.StringIO('start 1 2'), io.StringIO(), programme_1)
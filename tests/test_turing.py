@@ -0,0 +1,86 @@
+import random
+
+import pytest
+
+from turing import (Machine, Tape, compile_programme, programme_2,
+                    turing_machine)
+
+
+SYMBOLS = [None, 0, 1, 'start']
+
+
+def random_programme(rng):
+    """Returns a random programme of up to five states.
+
+    Half of the rules leave symbol and state unchanged, so that most
+    programmes sweep, and some state changes lead nowhere.
+    """
+    count = rng.randint(1, 5)
+    states = []
+    for state in range(count):
+        rules = []
+        for symbol in rng.sample(SYMBOLS, rng.randint(1, len(SYMBOLS))):
+            move = rng.choice(['right', 'left', 'right', 'left', 'halt'])
+            if rng.random() < 0.5:
+                rules.append([symbol, symbol, move, 0])
+            else:
+                rules.append([symbol, rng.choice(SYMBOLS), move,
+                              rng.randint(-state - 1, count - state)])
+        states.append(rules)
+    return [states]
+
+
+def make_machine(compiled, tape, head, page_bits):
+    machine = Machine(compiled, tape, head)
+    machine.cells = Tape(machine.cells.read(0, len(tape)), page_bits)
+    return machine
+
+
+def stepped(compiled, tape, head, budget, page_bits):
+    """Runs a machine one step at a time and counts the steps per rule."""
+    machine = make_machine(compiled, tape, head, page_bits)
+    counts = [0] * len(compiled.table)
+    while machine.reason is None and machine.steps < budget:
+        machine.step()
+        state, _, code, _ = machine.last
+        counts[state * compiled.width + code] += 1
+    return machine.result('max_steps'), counts
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_engines_agree(seed):
+    rng = random.Random(seed)
+    for _ in range(200):
+        compiled = compile_programme(random_programme(rng))
+        plain = compiled._replace(sweeps=[None] * len(compiled.table))
+        tape = [rng.choice(compiled.symbols)
+                for _ in range(rng.randint(1, 40))]
+        head = rng.randrange(len(tape))
+        budget = rng.choice([1, 7, 100, 3000])
+        page_bits = rng.choice([1, 2, 3, 12])
+        expected, counts = stepped(compiled, tape, head, budget, page_bits)
+
+        for programme in (compiled, plain):
+            machine = make_machine(programme, tape, head, page_bits)
+            machine.run(budget)
+            assert machine.result('max_steps') == expected
+
+        machine = make_machine(compiled, tape, head, page_bits)
+        machine.counts = [0] * len(compiled.table)
+        machine.run(budget)
+        assert machine.result('max_steps') == expected
+        assert machine.counts == counts
+
+
+def test_turing_machine_matches_stepping():
+    tape = ['start', 1, 0, 1, 1, None, 1, 1, 0]
+    compiled = compile_programme(programme_2)
+    expected, _ = stepped(compiled, tape, 0, 10 ** 6, 12)
+    assert turing_machine(list(tape), programme_2, 0, 0) == expected
+
+
+def test_head_inside_tape():
+    programme = [[[['start', 'start', 'right', 0], [None, None, 'halt', 0]]]]
+    result = turing_machine(['start'], programme, 0, 0)
+    assert result.tape == ['start', None]
+    assert result.head == 1
@@ -0,0 +1,34 @@
+import random
+
+import pytest
+
+# vectorized.py needs NumPy.
+pytest.importorskip('numpy')
+
+from turing import (compile_programme, programme_1, programme_2,  # noqa: E402
+                    turing_machine)
+from vectorized import run_lockstep  # noqa: E402
+
+
+@pytest.mark.parametrize('programme', [programme_1, programme_2])
+def test_lockstep_matches_turing_machine(programme):
+    rng = random.Random(0)
+    symbols = compile_programme(programme).symbols
+    tapes = [['start'] + [rng.choice(symbols)
+                          for _ in range(rng.randint(0, 12))]
+             for _ in range(50)]
+    results = run_lockstep(programme, tapes, max_steps=2000)
+    for tape, result in zip(tapes, results):
+        assert result == turing_machine(list(tape), programme, 0, 0, 2000)
+
+
+def test_head_past_the_tape():
+    programme = [[[['start', 'start', 'right', 0], [None, None, 'halt', 0]]]]
+    result, = run_lockstep(programme, [['start']])
+    assert result.tape == ['start', None]
+    assert result.head == 1
+
+
+def test_unknown_symbol_rejected():
+    with pytest.raises(ValueError):
+        run_lockstep(programme_1, [['start', 1], ['start', 2]])
@@ -160,85 +160,561 @@ paradigm in the future.
 [3] Thus, in a sense, the Turing machine implemented below is also biased.
 """
 
-def turing_machine(input_tape, programme, head_id, state_id):
-    """Recursive function for the execution of a Turing machine.
+import argparse
+import ast
+from collections import namedtuple
 
-    Following Turing's invention of the "stored programme" idea (Turing
-    1936), this Turing machine can be reprogrammed by adding other
-    programmes. In this implementation of the Turing machine, the programme
-    is, however, not stored on the tape itself.
+
+# The outcome of a run: the final tape, the position of the head, the
+# m-configuration the machine ended in, the number of steps performed and
+# the reason why the machine stopped ('halt', 'max_steps', 'error' or
+# 'non-halting').
+Result = namedtuple('Result', ['tape', 'head', 'state', 'steps', 'reason'])
+
+
+def change_state(instr, state_id):
+    """Manages the different states of the Turing machine.
+
+    The machine changes its state according to programme instructions:
+    instr is the number of states to move up or down in the programme.
     """
+    return state_id + int(instr)
 
-    def move_head(instruction, head_id):
-        """Imitates the moving head of a Turing machine.
 
-        Depending on the instructions of the programme defined in
-        turing_machine(), the head either moves right or left on the tape,
-        or halts the machine.
-        """
-        if instruction == 'right':
-            head_id += 1
-            print(f'The head moved right and is now at index {head_id}.')
-            return head_id
-        elif instruction == 'left':
-            head_id -= 1
-            print(f'The head moved left and is now at index {head_id}.')
-            return head_id
-        elif instruction == 'halt':
-            print(f'The programme has halted. The sequence computed by the '
-                  f'machine is: {tape}.')
-            print('The second number shows the result.')
-            exit()
-        else:
-            print('Error: Incorrect instructions for the movement of the head')
+def get_index(instructions, symbol):
+    """Checks which instructions in the programme matrix to follow.
+    """
+    for i,e in enumerate(instructions):
+        if str(symbol) == str(e[0]):
+            break
+    return i
+
+
+# A programme compiled into a transition table. Every symbol of the
+# programme is interned as an integer code (symbols[code] gives the symbol
+# back, codes[str(symbol)] gives the code); the blank None is always code 0.
+# The rule for state s and symbol code c is table[s * width + c], a tuple
+# (write code, move, next state) in which move is 1 (right), -1 (left),
+# 0 (halt) or None (incorrect instruction) and the next state is absolute.
+# sweeps[s * width + c] is (move, stop codes) if the rule is a sweep (see
+# find_sweeps()) and None otherwise.
+CompiledProgramme = namedtuple(
+    'CompiledProgramme',
+    ['symbols', 'codes', 'table', 'width', 'states', 'sweeps'])
+
+MOVES = {'right': 1, 'left': -1, 'halt': 0}
+
+
+def compile_programme(programme):
+    """Compiles a programme into a transition table.
+
+    The symbols read and written by the programme are interned, the rule
+    that get_index() would choose is looked up once for every combination
+    of state and symbol, and the relative state changes are resolved to
+    absolute state numbers. A rule that would move the machine to a state
+    that does not exist is compiled as an incorrect instruction. Already
+    compiled programmes are returned unchanged.
+    """
+    if isinstance(programme, CompiledProgramme):
+        return programme
+
+    states = programme[0]
+    symbols = [None]
+    codes = {str(None): 0}
+    for instructions in states:
+        if not instructions:
+            raise ValueError('Every state needs at least one instruction')
+        for rule in instructions:
+            for symbol in (rule[0], rule[1]):
+                if str(symbol) not in codes:
+                    codes[str(symbol)] = len(symbols)
+                    symbols.append(symbol)
+
+    if len(symbols) > 256:
+        raise ValueError('A programme can use at most 256 symbols')
+
+    table = []
+    for state_id, instructions in enumerate(states):
+        for symbol in symbols:
+            _, write, move, instr = instructions[
+                get_index(instructions, symbol)]
+            next_state = change_state(instr, state_id)
+            move = MOVES.get(move)
+            if move and not 0 <= next_state < len(states):
+                move = None
+            table.append((codes[str(write)], move, next_state))
+
+    return CompiledProgramme(tuple(symbols), codes, table, len(symbols),
+                             len(states), find_sweeps(table, len(symbols)))
+
+
+def find_sweeps(table, width):
+    """Finds the rules that sweep the head across the tape.
+
+    A rule is a sweep if it leaves the symbol and the state unchanged and
+    moves the head, like [0, 0, 'right', 0]: the machine keeps applying
+    the sweeps of its state that go in the same direction until it scans
+    one of the other symbols, the stop codes. Machine.run() performs a whole
+    sweep as one scan of the tape instead of one step per cell.
+    """
+    swept = {}
+    for index, (write, move, next_state) in enumerate(table):
+        if next_state * width <= index < (next_state + 1) * width and \
+                write == index - next_state * width and move in (1, -1):
+            swept.setdefault((next_state, move), []).append(write)
+
+    sweeps = [None] * len(table)
+    for (state_id, move), codes in swept.items():
+        stops = bytes(code for code in range(width) if code not in codes)
+        for code in codes:
+            sweeps[state_id * width + code] = (move, stops)
+    return sweeps
+
+
+class Tape:
+    """A tape that grows on demand in both directions.
+
+    The cells hold symbol codes and are stored in pages of 2**page_bits
+    cells: each page is a dense bytearray, while the pages themselves live
+    in a dictionary keyed by page number, so only the regions of the tape
+    the head has actually visited take up memory. Cell indices may be
+    negative; a page that does not exist yet reads as blank (code 0).
+    """
+
+    def __init__(self, cells=b'', page_bits=12):
+        self.page_bits = page_bits
+        self.page_size = 1 << page_bits
+        self.pages = {}
+        # The numbers of the pages handed out by page() since the last
+        # checkpoint, a superset of the pages changed since then.
+        self.dirty = set()
+        # The number of cells the tape was prepared with.
+        self.length = len(cells)
+        cells = bytes(cells)
+        for start in range(0, len(cells), self.page_size):
+            self.page(start >> page_bits)[:] = \
+                cells[start:start + self.page_size].ljust(self.page_size,
+                                                          b'\0')
+
+    def page(self, number):
+        """Returns page number `number`, creating a blank one if needed."""
+        self.dirty.add(number)
+        page = self.pages.get(number)
+        if page is None:
+            page = self.pages[number] = bytearray(self.page_size)
+        return page
+
+    def peek(self, number):
+        """Returns page number `number`, or None if it does not exist."""
+        return self.pages.get(number)
+
+    def __getitem__(self, index):
+        page = self.peek(index >> self.page_bits)
+        return 0 if page is None else page[index & (self.page_size - 1)]
+
+    def __setitem__(self, index, code):
+        self.page(index >> self.page_bits)[
+            index & (self.page_size - 1)] = code
+
+    def bounds(self):
+        """Returns the range of cells that were prepared or are not blank."""
+        start, stop = 0, self.length
+        for number in sorted(self.pages):
+            page = self.pages[number]
+            if page.strip(b'\0'):
+                offset = number << self.page_bits
+                start = min(start, offset + len(page) -
+                            len(page.lstrip(b'\0')))
+                stop = max(stop, offset + len(page.rstrip(b'\0')))
+        return start, stop
+
+    def read(self, start, stop):
+        """Returns the codes of the cells from start to stop as bytes."""
+        cells = bytearray()
+        while start < stop:
+            number, offset = start >> self.page_bits, \
+                start & (self.page_size - 1)
+            count = min(stop - start, self.page_size - offset)
+            page = self.peek(number)
+            cells += bytes(count) if page is None else \
+                page[offset:offset + count]
+            start += count
+        return bytes(cells)
+
+
+def encode_tape(compiled, input_tape):
+    """Translates a tape into a Tape of symbol codes of a compiled programme.
+    """
+    codes = compiled.codes
+    try:
+        return Tape(bytes(codes[str(symbol)] for symbol in input_tape))
+    except KeyError as error:
+        raise ValueError(f'The symbol {error.args[0]} is not part of the '
+                         f'alphabet of the programme') from None
+
 
-    def change_state(instr, state_id):
-        """Manages the different states of the Turing machine.
+def decode_tape(compiled, cells):
+    """Translates symbol codes back into the symbols of the programme."""
+    symbols = compiled.symbols
+    return [symbols[code] for code in cells]
 
-        The machine changes its state according to programme instructions.
+
+def scan(page, pos, move, stops, remaining):
+    """Performs a sweep on a page of the tape.
+
+    Starting at pos, the head moves in the direction of move until it scans
+    one of the stop codes, has passed `remaining` cells or leaves the page.
+    Returns where the head ends up: at the stop code, after the remaining
+    cells or just outside the page (-1 or len(page)).
+    """
+    if move == 1:
+        end = min(len(page), pos + remaining)
+        found = [i for i in (page.find(code, pos, end) for code in stops)
+                 if i >= 0]
+        return min(found) if found else end
+    start = max(0, pos + 1 - remaining)
+    return max([page.rfind(code, start, pos + 1) for code in stops] +
+               [start - 1])
+
+
+class Machine:
+    """The complete configuration of a Turing machine.
+
+    A machine holds a compiled programme, the Tape (as symbol codes), the
+    position of the head, the current state and the number of steps
+    performed so far. reason is None while the machine can continue and
+    'halt' or 'error' once it has stopped ('non-halting' if a CycleDetector
+    stopped it).
+    """
+
+    def __init__(self, programme, input_tape, head_id=0, state_id=0):
+        self.programme = compile_programme(programme)
+        self.cells = encode_tape(self.programme, input_tape)
+        self.head = head_id
+        self.state = state_id
+        self.steps = 0
+        self.reason = None
+        # (state, head, scanned code, rule) of the last call to step()
+        self.last = None
+        # Steps per rule, counted by run() if set to a list
+        self.counts = None
+
+    def bounds(self):
+        """Returns the range of cells that tape() covers."""
+        start, stop = self.cells.bounds()
+        return min(start, self.head), max(stop, self.head + 1)
+
+    def tape(self):
+        """Returns the symbols currently written on the tape.
+
+        The list starts at cell 0, or further left if the machine has
+        written to (or moved its head to) cells left of it, and reaches at
+        least up to the head.
+        """
+        return decode_tape(self.programme, self.cells.read(*self.bounds()))
+
+    def step(self):
+        """Performs a single step and remembers it in self.last."""
+        code = self.cells[self.head]
+        rule = self.programme.table[self.state * self.programme.width + code]
+        self.last = (self.state, self.head, code, rule)
+        self.run(1)
+
+    def run(self, budget=None):
+        """Performs up to budget steps (all of them if budget is None).
+
+        This is the hot loop of the machine: it neither prints nor calls
+        back, and returns as soon as the machine halts or receives an
+        incorrect instruction. It works directly on the page under the
+        head and only goes back to the Tape when the head leaves the page.
+        Sweeps are performed as bulk scans of the page, but are counted
+        step by step, so the step count is the same as for single steps.
+        If self.counts is a list, the steps are also counted per rule,
+        i.e. per index of the transition table, in a separate copy of the
+        loop.
         """
+        if self.reason is not None:
+            return
+        table, width = self.programme.table, self.programme.width
+        sweeps = self.programme.sweeps
+        counts = self.counts
+        tape = self.cells
+        bits, size = tape.page_bits, tape.page_size
+        outside = -size
+        number, pos = self.head >> bits, self.head & (size - 1)
+        page = tape.page(number)
+        state = self.state
+        limit = -1 if budget is None else budget
+        steps = 0
+        while counts is None and steps != limit:
+            index = state * width + page[pos]
+            sweep = sweeps[index]
+            if sweep is not None:
+                move, stops = sweep
+                stop = scan(page, pos, move, stops,
+                            size if limit < 0 else limit - steps)
+                steps += (stop - pos) * move
+                pos = stop
+            else:
+                write, move, state = table[index]
+                page[pos] = write
+                steps += 1
+                if move:
+                    pos += move
+                else:
+                    self.reason = 'halt' if move == 0 else 'error'
+                    break
+            if pos & outside:
+                number += move
+                page = tape.page(number)
+                pos -= move << bits
+
+        # The codes swept by every state and direction met so far.
+        swept = {}
+        while counts is not None and steps != limit:
+            index = state * width + page[pos]
+            sweep = sweeps[index]
+            if sweep is not None:
+                move, stops = sweep
+                stop = scan(page, pos, move, stops,
+                            size if limit < 0 else limit - steps)
+                # A sweep passes over several codes, each with a rule of
+                # its own: count the cells of every code it passed.
+                base = state * width
+                codes = swept.get((state, move))
+                if codes is None:
+                    codes = swept[state, move] = [
+                        code for code in range(width)
+                        if sweeps[base + code] is not None and
+                        sweeps[base + code][0] == move]
+                low, high = (pos, stop) if move == 1 else (stop + 1, pos + 1)
+                for code in codes:
+                    counts[base + code] += page.count(code, low, high)
+                steps += (stop - pos) * move
+                pos = stop
+            else:
+                counts[index] += 1
+                write, move, state = table[index]
+                page[pos] = write
+                steps += 1
+                if move:
+                    pos += move
+                else:
+                    self.reason = 'halt' if move == 0 else 'error'
+                    break
+            if pos & outside:
+                number += move
+                page = tape.page(number)
+                pos -= move << bits
+
+        self.head, self.state = (number << bits) + pos, state
+        self.steps += steps
+
+    def result(self, reason=None):
+        """Returns the current configuration as a Result.
+
+        The head position of the Result is an index into its tape.
+        """
+        start = self.bounds()[0]
+        return Result(self.tape(), self.head - start, self.state, self.steps,
+                      self.reason or reason)
+
+
+class Tracer:
+    """Base class for observers of a running machine.
+
+    step() is called with the machine after every `every` steps, with
+    every = 0 meaning never; finish() is called once with the Result.
+    step() may stop the machine by setting machine.reason.
+    A tracer with every = 1 can read the scanned symbol and the rule of the
+    step just performed from machine.last. The less often a tracer asks to
+    be called, the more steps run on the fast path of Machine.run().
+    """
+    every = 0
+
+    def start(self, machine):
+        pass
+
+    def step(self, machine):
+        pass
+
+    def finish(self, result):
+        pass
+
+
+class NarratingTracer(Tracer):
+    """Narrates every step of the machine in plain words."""
+    every = 1
+
+    def step(self, machine):
+        state_id, head_id, code, (write, move, next_state) = machine.last
+        symbols = machine.programme.symbols
+        print(f'The head scanned the symbol {symbols[code]}.')
+        print(f'The number was changed to {symbols[write]}.')
+
+        instr = next_state - state_id
         if instr == 0:
             print('The state remains the same.')
-            return state_id
         elif instr == 1:
-            state_id = state_id + 1
             print('The machine moved to the next state of the programme.')
-            return state_id
         elif instr == -1:
-            state_id = state_id - 1
             print('The machine moved to the previous state of the programme.')
-            return state_id
         else:
-            state_id = state_id + int(instr)
             print(f'The machine moved {instr} steps.')
-            return int(state_id)
 
-    def get_index():
-        """Checks which instructions in the programme matrix to follow.
-        """
-        for i,e in enumerate(programme[0][state_id]):
-            if str(input_tape[head_id]) == str(e[0]):
-                break
-        return i
+        if move == 1:
+            print(f'The head moved right and is now at index {machine.head}.')
+        elif move == -1:
+            print(f'The head moved left and is now at index {machine.head}.')
+        elif move is None:
+            print('Error: Incorrect instructions for the movement of the head')
+        if move:
+            print(f'The tape now reads: {machine.tape()}.')
+
+    def finish(self, result):
+        if result.reason == 'halt':
+            print(f'The programme has halted. The sequence computed by the '
+                  f'machine is: {result.tape}.')
+            print('The second number shows the result.')
+
+
+class SamplingTracer(Tracer):
+    """Reports the state and head position every `every` steps."""
+
+    def __init__(self, every=1000000):
+        self.every = every
 
-    # Chose a programme to run (set variable to programme_1 or programme_2)
-    # programme = programme_2
+    def step(self, machine):
+        print(f'Step {machine.steps}: state {machine.state}, head at index '
+              f'{machine.head}.')
 
-    # Check which instruction of the programme to follow
-    i = get_index()
 
-    # Change the tape according to programme instructions
-    print(f'The head scanned the symbol {input_tape[head_id]}.')
-    input_tape[head_id] = programme[0][state_id][i][1]
-    print(f'The number was changed to {programme[0][state_id][i][1]}.')
+class SummaryTracer(Tracer):
+    """Reports only the outcome of the run."""
 
-    # Check if programme requires state change and move the head
-    new_state = change_state(programme[0][state_id][i][3], state_id)
-    new_head = move_head(programme[0][state_id][i][2], head_id)
-    print(f'The tape now reads: {input_tape}.')
+    def finish(self, result):
+        print(f'The machine stopped ({result.reason}) in state '
+              f'{result.state} after {result.steps} steps with the head at '
+              f'index {result.head}.')
 
-    # Tail recursion
-    turing_machine(input_tape, programme, new_head, new_state)
+
+class CycleDetector(Tracer):
+    """Stops a machine once it is proven that it will never halt.
+
+    Every `every` steps, two checks are made. The first one looks for a
+    machine that runs off into the blank part of the tape: if the head is
+    beyond the last written cell and the rule for a blank keeps the state
+    and moves further out, the machine will repeat that rule forever. The
+    second one compares the configuration (state, tape and head position
+    relative to the written part of the tape) with a snapshot; the snapshot
+    is renewed after 1, 2, 4, 8, ... checks (Brent's algorithm), so a cycle
+    is found eventually with only one snapshot in memory. As the tape is
+    blank on both sides, a configuration that repeats shifted along the tape
+    is a cycle as well.
+    """
+
+    def __init__(self, every=65536):
+        self.every = every
+
+    def start(self, machine):
+        self.snapshot = None
+        self.power = 1
+        self.count = 0
+
+    def step(self, machine):
+        if machine.reason is not None:
+            return
+        start, stop = machine.cells.bounds()
+        programme = machine.programme
+        _, move, next_state = programme.table[machine.state *
+                                              programme.width]
+        if next_state == machine.state and (
+                move == 1 and machine.head >= stop or
+                move == -1 and machine.head < start):
+            machine.reason = 'non-halting'
+            return
+
+        configuration = (machine.state, machine.head - start,
+                         machine.cells.read(start, stop))
+        if configuration == self.snapshot:
+            machine.reason = 'non-halting'
+            return
+        self.count += 1
+        if self.count == self.power:
+            self.snapshot = configuration
+            self.power *= 2
+            self.count = 0
+
+
+def turing_machine(input_tape, programme, head_id, state_id, max_steps=None,
+                   tracer=None, detect_cycles=False):
+    """Iterative function for the execution of a Turing machine.
+
+    Following Turing's invention of the "stored programme" idea (Turing
+    1936), this Turing machine can be reprogrammed by adding other
+    programmes. In this implementation of the Turing machine, the programme
+    is, however, not stored on the tape itself. The programme is compiled
+    into a transition table before it is executed; pass the result of
+    compile_programme() to reuse the table across many runs.
+
+    The machine performs one step after the other until it halts, until it
+    receives an incorrect instruction or until max_steps steps have been
+    performed (if given). The tape is changed in place and returned, together
+    with the final head position, state and step count, as a Result.
+
+    The machine runs silently unless a Tracer (or a list of them) is given,
+    e.g. NarratingTracer() to follow every step. With detect_cycles, a
+    CycleDetector stops machines that never halt with reason 'non-halting'.
+    """
+    machine = Machine(programme, input_tape, head_id, state_id)
+    result = run_machine(machine, max_steps, tracer, detect_cycles)
+    input_tape[:] = result.tape
+    return result._replace(tape=input_tape)
+
+
+def run_machine(machine, max_steps=None, tracer=None, detect_cycles=False):
+    """Runs a Machine as turing_machine() does and returns the Result.
+
+    max_steps counts all the steps of the machine, including those it
+    performed before, so a machine that is stopped and run again with the
+    same max_steps ends up in the same configuration.
+    """
+    if tracer is None:
+        tracers = []
+    elif isinstance(tracer, Tracer):
+        tracers = [tracer]
+    else:
+        tracers = list(tracer)
+    if detect_cycles:
+        tracers.append(CycleDetector())
+    for tracer in tracers:
+        tracer.start(machine)
+    stepping = any(tracer.every == 1 for tracer in tracers)
+
+    while machine.reason is None:
+        budget = None if max_steps is None else max_steps - machine.steps
+        if budget is not None and budget <= 0:
+            break
+        if stepping:
+            machine.step()
+        else:
+            # Run until the next tracer is due
+            chunk = min((tracer.every - machine.steps % tracer.every
+                         for tracer in tracers if tracer.every),
+                        default=budget)
+            if budget is not None:
+                chunk = min(chunk, budget)
+            machine.run(chunk)
+        for tracer in tracers:
+            if tracer.every and (machine.steps % tracer.every == 0 or
+                                 machine.reason is not None or
+                                 machine.steps == max_steps):
+                tracer.step(machine)
+
+    result = machine.result('max_steps')
+    for tracer in tracers:
+        tracer.finish(result)
+    return result
 
 
 # Programmes
@@ -273,8 +749,8 @@ programme_1 = [[
 # Programme 2: Adds two numbers. Numbers have to be separated on the tape
 # (list) by None, e.g.:
 # ('start', 1, 0, 1, None, 1, 0, 0, None, None, None, None)
-# In order to be able to add large numbers and to simulate Turing's
-# infinite tape, make sure to add a few empty slots at the end of the tape.
+# The tape grows with empty slots (None) on demand, which simulates
+# Turing's infinite tape, so large numbers can be added without padding.
 
 programme_2 = [[
     # m-configurations
@@ -364,6 +840,9 @@ programme_2 = [[
     ],
 ]]
 
+# The programmes by name
+PROGRAMMES = {'programme_1': programme_1, 'programme_2': programme_2}
+
 # Initialization (initial m-configuration of the machine)
 head_init = 0
 state_init = 0
@@ -372,10 +851,58 @@ state_init = 0
 # Note: the tape needs to be prepared according to the workings of the chosen
 # programme (see comments on the two exemplary programmes above)
 tape = ['start',1,1,1,0,1,None,1,1, None, None, None, None, None]
-print(f'Input: {tape}')
 
-# Main
-turing_machine(tape, programme_2, head_init, state_init)
+TRACERS = {
+    'narrate': NarratingTracer,
+    'sample': SamplingTracer,
+    'summary': SummaryTracer,
+    'none': lambda: None,
+}
+
+
+def main(argv=None):
+    """Runs a programme over a tape given on the command line."""
+    parser = argparse.ArgumentParser(
+        description='Run a Turing machine programme over a tape.')
+    parser.add_argument('--programme', default='programme_2',
+                        help='the name of a programme ('
+                             f"{', '.join(sorted(PROGRAMMES))}) or a "
+                             'programme file (see loader.py)')
+    parser.add_argument('--tape', type=ast.literal_eval, default=tape,
+                        help="the tape as a Python list, e.g. "
+                             "\"['start', 1, 0, 1, None, 1, 1]\"")
+    parser.add_argument('--max-steps', type=int,
+                        help='stop the machine after this many steps')
+    parser.add_argument('--trace', choices=list(TRACERS), default='narrate',
+                        help='how to report on the run (default: narrate)')
+    parser.add_argument('--every', type=int, default=1000000,
+                        help='steps between two reports of --trace sample')
+    parser.add_argument('--detect-cycles', action='store_true',
+                        help='stop machines that provably never halt')
+    args = parser.parse_args(argv)
+
+    tracer = TRACERS[args.trace]()
+    if args.trace == 'sample':
+        tracer.every = args.every
+    input_tape = list(args.tape)
+    print(f'Input: {input_tape}')
+
+    if args.programme in PROGRAMMES:
+        programme = PROGRAMMES[args.programme]
+    else:
+        from loader import load_programme
+        programme = load_programme(args.programme)
+
+    # Main
+    result = turing_machine(input_tape, programme, head_init, state_init,
+                            args.max_steps, tracer, args.detect_cycles)
+    if args.trace != 'narrate':
+        print(f'Output: {result.tape}')
+    return result
+
+
+if __name__ == '__main__':
+    main()
 
 """The code above is an attempt to imitate the functioning of a Turing 
 machine very closely. The Turing machine implemented here includes two 
@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+
+"""Runs many small machines in lockstep with NumPy.
+
+For a large batch of short tapes, most of the time of turing_machine() goes
+into setting up and driving one machine after the other. run_lockstep()
+instead keeps all the tapes of the batch as the rows of one 2-D array of
+symbol codes, together with a vector of head positions and a vector of
+states, and performs one step of every running machine at a time: the
+scanned codes, the rules and the new symbols, states and head positions are
+all looked up in the compiled transition table with array indexing.
+Machines that halt (or receive an incorrect instruction) are dropped from
+the vectors, so that the remaining ones go on as fast as before.
+
+All machines run the same programme from the same initial head position
+and state, and the Results are the same as turing_machine() would return
+for each tape. NumPy is required.
+"""
+
+import argparse
+import itertools
+import random
+import time
+
+import numpy as np
+
+from turing import PROGRAMMES, Result, compile_programme, turing_machine
+
+
+def compile_arrays(compiled):
+    """Returns the transition table of a compiled programme as arrays.
+
+    These are the codes written, the head moves (0 if the machine stops),
+    the next states multiplied by the width of the table (so that they can
+    be added to a scanned code to index the table) and the reasons for
+    stopping (0 to continue, 1 to halt and 2 for an incorrect instruction).
+    """
+    table, width = compiled.table, compiled.width
+    write = np.array([rule[0] for rule in table], dtype=np.uint8)
+    move = np.array([rule[1] or 0 for rule in table], dtype=np.int64)
+    following = np.array([rule[2] * width for rule in table], dtype=np.int64)
+    ends = np.array([0 if rule[1] else 1 if rule[1] == 0 else 2
+                     for rule in table], dtype=np.int8)
+    return write, move, following, ends
+
+
+def encode_tapes(compiled, tapes, margin=16):
+    """Packs tapes into the rows of an array with margin blank columns on
+    either side; returns the array and the lengths of the tapes.
+    """
+    codes = compiled.codes
+    lengths = np.array([len(tape) for tape in tapes], dtype=np.int64)
+    columns = int(lengths.max(initial=0)) + 2 * margin
+    cells = np.zeros((len(tapes), columns), dtype=np.uint8)
+    try:
+        symbols = list(map(codes.__getitem__,
+                           map(str, itertools.chain.from_iterable(tapes))))
+    except KeyError as error:
+        raise ValueError(f'The symbol {error.args[0]} is not part of the '
+                         f'alphabet of the programme') from None
+    # The flat index of every symbol: the start of its row plus the margin
+    # plus its position on its tape.
+    starts = np.repeat(np.arange(len(tapes)) * columns + margin, lengths)
+    offsets = np.arange(len(symbols)) - np.repeat(
+        np.cumsum(lengths) - lengths, lengths)
+    cells.reshape(-1)[starts + offsets] = symbols
+    return cells, lengths
+
+
+def run_lockstep(programme, tapes, head_id=0, state_id=0, max_steps=None):
+    """Runs a programme over every tape at once and returns their Results.
+
+    The machines are stepped together until every one of them has halted
+    or received an incorrect instruction, or until max_steps steps have
+    been performed. The tapes are not changed.
+    """
+    compiled = compile_programme(programme)
+    width = compiled.width
+    write, move, following, ends = compile_arrays(compiled)
+    tapes = list(tapes)
+    count = len(tapes)
+    margin = 16
+    cells, lengths = encode_tapes(compiled, tapes, margin)
+    columns = cells.shape[1]
+    # The column of cell 0 of every tape.
+    origin = margin
+
+    # The running machines: their rows, the flat indices of their heads in
+    # cells and their states times the width of the table.
+    rows = np.arange(count, dtype=np.int64)
+    heads = rows * columns + origin + head_id
+    states = np.full(count, state_id * width, dtype=np.int64)
+
+    final_heads = np.zeros(count, dtype=np.int64)
+    final_states = np.zeros(count, dtype=np.int64)
+    final_steps = np.zeros(count, dtype=np.int64)
+    reasons = [None] * count
+
+    def stopped(done, steps):
+        final_rows = rows[done]
+        final_heads[final_rows] = heads[done] - final_rows * columns - origin
+        final_states[final_rows] = states[done] // width
+        final_steps[final_rows] = steps
+
+    steps = 0
+    room = min(origin + head_id, columns - 1 - origin - head_id)
+    while len(rows) and steps != max_steps:
+        while room <= 0:
+            # Widen the array where a head is about to fall off it.
+            column = heads - rows * columns
+            left = columns if column.min() < 1 else 0
+            right = columns if column.max() >= columns - 1 else 0
+            wider = np.zeros((count, left + columns + right), dtype=np.uint8)
+            wider[:, left:left + columns] = cells
+            heads += rows * (left + right) + left
+            cells, origin = wider, origin + left
+            columns = cells.shape[1]
+            column = heads - rows * columns
+            room = min(column.min(), columns - 1 - column.max())
+
+        flat = cells.reshape(-1)
+        index = states + flat[heads]
+        flat[heads] = write[index]
+        ended = ends[index]
+        states = following[index]
+        heads += move[index]
+        steps += 1
+        room -= 1
+        if ended.any():
+            done = ended != 0
+            stopped(done, steps)
+            for row, reason in zip(rows[done], ended[done]):
+                reasons[row] = 'halt' if reason == 1 else 'error'
+            running = ~done
+            rows, heads, states = rows[running], heads[running], \
+                states[running]
+
+    stopped(np.ones(len(rows), dtype=bool), steps)
+
+    # Every tape runs from cell 0 to its length, widened to the leftmost
+    # and rightmost non-blank cells and to the head.
+    written = cells != 0
+    blank = ~written.any(axis=1)
+    first = np.where(blank, origin, written.argmax(axis=1)) - origin
+    last = np.where(blank, origin, columns - written[:, ::-1].argmax(axis=1))
+    starts = np.minimum(np.minimum(first, final_heads), 0) + origin
+    stops = np.maximum(np.maximum(last - origin, lengths),
+                       final_heads + 1) + origin
+    symbols = np.empty(width, dtype=object)
+    symbols[:] = compiled.symbols
+    decoded = symbols[cells].tolist()
+    return [Result(decoded[row][start:stop], head + origin - start, state,
+                   steps, reason or 'max_steps')
+            for row, (start, stop, head, state, steps, reason) in enumerate(
+                zip(starts.tolist(), stops.tolist(), final_heads.tolist(),
+                    final_states.tolist(), final_steps.tolist(), reasons))]
+
+
+def compare(name, count, bits, max_steps=None, seed=0):
+    """Times run_lockstep() against turing_machine() on random numbers.
+
+    Returns the seconds taken by either and checks that the Results agree.
+    """
+    rng = random.Random(seed)
+
+    def number():
+        return [rng.randint(0, 1) for _ in range(bits)] + [0]
+
+    if name == 'programme_1':
+        tapes = [['start'] + number() for _ in range(count)]
+    else:
+        tapes = [['start'] + number() + [None] + number()
+                 for _ in range(count)]
+    programme = compile_programme(PROGRAMMES[name])
+
+    begin = time.perf_counter()
+    expected = [turing_machine(list(tape), programme, 0, 0, max_steps)
+                for tape in tapes]
+    looped = time.perf_counter() - begin
+
+    begin = time.perf_counter()
+    results = run_lockstep(programme, tapes, max_steps=max_steps)
+    lockstep = time.perf_counter() - begin
+
+    if results != expected:
+        raise AssertionError('run_lockstep() and turing_machine() disagree')
+    return looped, lockstep
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Compare lockstep runs of many machines with a loop '
+                    'over turing_machine().')
+    parser.add_argument('--programme', choices=sorted(PROGRAMMES),
+                        default='programme_1')
+    parser.add_argument('--count', type=int, default=10000,
+                        help='number of tapes')
+    parser.add_argument('--bits', type=int, default=8,
+                        help='bits of the numbers on every tape')
+    parser.add_argument('--max-steps', type=int,
+                        help='stop the runs after this many steps')
+    args = parser.parse_args(argv)
+
+    looped, lockstep = compare(args.programme, args.count, args.bits,
+                               args.max_steps)
+    print(f'turing_machine(): {looped:.3f} s')
+    print(f'run_lockstep():   {lockstep:.3f} s ({looped / lockstep:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()